@@ -1,35 +1,188 @@
 # Recorder Agent class
+import asyncio
 import json
-import datetime
 from dotenv import load_dotenv
 import os
+from .ResponseCache import get_response_cache
+from .RateLimiter import get_rate_limiter
+from tracing import span
+from logger import get_logger
 
 dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env')
 load_dotenv(dotenv_path)
 LLM_MODEL = os.getenv('LLM_MODEL')
 
-def log_step(message):
-    """Print a timestamped log message"""
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {message}")
+logger = get_logger(__name__)
+
+class ResponseParseError(Exception):
+    """Raised when an LLM response cannot be parsed into the agent's expected output"""
+
+
+def cached_text_block(text):
+    """Text content block marked as a prompt-cache breakpoint"""
+    return {"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}
 
 class Agent:
-    def __init__(self, client):
+    # Static instructions sent as the system prompt, cached across calls
+    system_prompt = None
+    # Tool the model is forced to call for structured output
+    tool = None
+    
+    def __init__(self, client, async_client=None, cache=None, rate_limiter=None):
         self.client = client
+        self.async_client = async_client
+        self.cache = cache if cache is not None else get_response_cache()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter()
+        self.last_usage = None
+    
+    def _build_request(self, prompt, max_tokens, system=None):
+        """Build the keyword arguments for a messages.create call.
+        
+        prompt is either a string or a list of content blocks; system, when
+        given, is cached so the shared prefix is only processed once.
+        """
+        request = {
+            "model": LLM_MODEL,
+            "max_tokens": max_tokens,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ]
+        }
+        if system:
+            request["system"] = [cached_text_block(system)]
+        if self.tool:
+            request["tools"] = [self.tool]
+            request["tool_choice"] = {"type": "tool", "name": self.tool["name"]}
+        return request
     
-    def _call_llm(self, prompt, max_tokens=2500):
-        """Make a call to the LLM API"""
+    def _response_text(self, message):
+        """Return the text of a Messages API response, or the tool input as JSON for structured output"""
+        if self.tool:
+            for block in message.content:
+                if block.type == "tool_use":
+                    return json.dumps(block.input)
+        return message.content[0].text
+    
+    def _record_usage(self, message):
+        """Log token usage of a response, including prompt cache reads and writes, and return it"""
+        usage = getattr(message, 'usage', None)
+        if usage is None:
+            return None
+        self.last_usage = {
+            "input_tokens": usage.input_tokens,
+            "output_tokens": usage.output_tokens,
+            "cache_read_input_tokens": getattr(usage, 'cache_read_input_tokens', None) or 0,
+            "cache_creation_input_tokens": getattr(usage, 'cache_creation_input_tokens', None) or 0,
+        }
+        logger.debug(
+            "%s: Tokens in=%d out=%d cache_read=%d cache_write=%d",
+            self.__class__.__name__,
+            self.last_usage['input_tokens'],
+            self.last_usage['output_tokens'],
+            self.last_usage['cache_read_input_tokens'],
+            self.last_usage['cache_creation_input_tokens'],
+        )
+        return self.last_usage
+    
+    def _parse_json(self, response_text):
+        """Parse a response into the agent's output; raises on a malformed response"""
+        raise NotImplementedError
+    
+    def _parse_fallback(self, error):
+        """Result returned in place of a response that could not be parsed"""
+        raise NotImplementedError
+    
+    def _parse_response(self, response_text):
+        """Parse a response, returning the agent's fallback result if it is malformed"""
         try:
-            log_step(f"{self.__class__.__name__}: 🔄 Sending request to Claude API...")
-            message = self.client.messages.create(
-                model=LLM_MODEL,
-                max_tokens=max_tokens,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            log_step(f"{self.__class__.__name__}: Received response from Claude API")
-            return message.content[0].text
+            return self._parse_json(response_text)
         except Exception as e:
-            log_step(f"{self.__class__.__name__}: Error calling LLM: {e}")
-            raise
\ No newline at end of file
+            return self._parse_fallback(e)
+    
+    def _parse_cached(self, cached, parse):
+        """Parse a cached response; returns (result, ok) and ok is False when it no longer parses"""
+        if parse is None:
+            return cached, True
+        try:
+            return parse(cached), True
+        except Exception as e:
+            logger.warning("%s: Ignoring cached response that fails to parse: %s", self.__class__.__name__, e)
+            return None, False
+    
+    def _parse_fresh(self, response_text, parse):
+        """Parse a new response, raising ResponseParseError so it is never cached"""
+        if parse is None:
+            return response_text
+        try:
+            return parse(response_text)
+        except Exception as e:
+            raise ResponseParseError(str(e)) from e
+    
+    def _cache_lookup(self, request, use_cache):
+        """Return (cache_key, cached_response); cache_key is None when caching is off"""
+        if not use_cache or self.cache is None or self.cache.bypass:
+            return None, None
+        cache_key = self.cache.make_key(request)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.info("%s: ⚡ Using cached response", self.__class__.__name__)
+        return cache_key, cached
+    
+    def _call_llm(self, prompt, max_tokens=2500, system=None, use_cache=True, parse=None):
+        """Make a call to the LLM API, reusing a cached response for an identical request.
+
+        The call goes through the shared rate limiter, which retries 429/529 and
+        transient errors; only errors it gives up on reach the except below.
+        When parse is given the parsed result is returned, and a response is only
+        cached once it parses; a malformed one raises ResponseParseError.
+        """
+        request = self._build_request(prompt, max_tokens, system)
+        with span(f"llm.{self.__class__.__name__}") as trace:
+            cache_key, cached = self._cache_lookup(request, use_cache)
+            if cached is not None:
+                result, ok = self._parse_cached(cached, parse)
+                if ok:
+                    trace["cache_hit"] = True
+                    return result
+            trace["cache_hit"] = False
+            try:
+                logger.debug("%s: 🔄 Sending request to Claude API...", self.__class__.__name__)
+                message = self.rate_limiter.call(self.client.messages.create, request)
+                logger.debug("%s: Received response from Claude API", self.__class__.__name__)
+                trace.update(self._record_usage(message) or {})
+                response_text = self._response_text(message)
+            except Exception as e:
+                logger.error("%s: Error calling LLM: %s", self.__class__.__name__, e)
+                raise
+            result = self._parse_fresh(response_text, parse)
+            if cache_key is not None:
+                self.cache.set(cache_key, response_text)
+            return result
+    
+    async def _acall_llm(self, prompt, max_tokens=2500, system=None, use_cache=True, parse=None):
+        """Make a call to the LLM API without blocking the event loop"""
+        if self.async_client is None:
+            raise RuntimeError(f"{self.__class__.__name__} was created without an async client")
+        request = self._build_request(prompt, max_tokens, system)
+        with span(f"llm.{self.__class__.__name__}") as trace:
+            # The cache is a SQLite file, so its reads and writes run in a worker thread
+            cache_key, cached = await asyncio.to_thread(self._cache_lookup, request, use_cache)
+            if cached is not None:
+                result, ok = self._parse_cached(cached, parse)
+                if ok:
+                    trace["cache_hit"] = True
+                    return result
+            trace["cache_hit"] = False
+            try:
+                logger.debug("%s: 🔄 Sending async request to Claude API...", self.__class__.__name__)
+                message = await self.rate_limiter.acall(self.async_client.messages.create, request)
+                logger.debug("%s: Received response from Claude API", self.__class__.__name__)
+                trace.update(self._record_usage(message) or {})
+                response_text = self._response_text(message)
+            except Exception as e:
+                logger.error("%s: Error calling LLM: %s", self.__class__.__name__, e)
+                raise
+            result = self._parse_fresh(response_text, parse)
+            if cache_key is not None:
+                await asyncio.to_thread(self.cache.set, cache_key, response_text)
+            return result
@@ -0,0 +1,179 @@
+from .EvaluatorAgent import EvaluatorAgent
+from .ReviewerAgent import ReviewerAgent
+from .RecorderAgent import RecorderAgent
+from .ConvergencePolicy import ConvergencePolicy
+from db.db_helper import get_role_candidates
+from logger import get_logger
+
+import os
+import time
+from dotenv import load_dotenv
+
+dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env')
+load_dotenv(dotenv_path)
+BATCH_POLL_INTERVAL = int(os.getenv('BATCH_POLL_INTERVAL', '60'))
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', '10000'))
+
+logger = get_logger(__name__)
+
+class BatchOrchestrator:
+    """Re-screens all candidates of a role with one Message Batch per evaluator/reviewer pass"""
+
+    def __init__(self, anthropic_client, poll_interval=BATCH_POLL_INTERVAL, max_requests=BATCH_MAX_REQUESTS, policy=None):
+        self.anthropic_client = anthropic_client
+        self.evaluator = EvaluatorAgent(anthropic_client)
+        self.reviewer = ReviewerAgent(anthropic_client)
+        self.recorder = RecorderAgent(anthropic_client)
+        self.policy = policy or ConvergencePolicy()
+        self.max_iterations = self.policy.max_iterations
+        self.poll_interval = poll_interval
+        self.max_requests = max_requests
+
+    def rescreen_role(self, role, candidates=None):
+        """Evaluate, review and record every candidate of a role.
+
+        Each recorded evaluation replaces the candidate's earlier ones for the
+        role. Returns {candidate_id: evaluation_id}; the id is None for
+        candidates that were not recorded because one of their batch requests
+        failed, and their earlier evaluation is kept.
+        """
+        if candidates is None:
+            candidates = get_role_candidates(role['id'])
+        logger.info("🚀 BATCH: Re-screening %d candidates for role %s", len(candidates), role['title'])
+        if not candidates:
+            return {}
+
+        by_id = {f"candidate-{c['id']}": c for c in candidates}
+        review_history = {custom_id: [] for custom_id in by_id}
+        iterations = {custom_id: 1 for custom_id in by_id}
+
+        # Initial evaluation of every candidate
+        evaluations = self._run_batch(
+            self.evaluator,
+            {custom_id: self.evaluator._build_prompt(c, role) for custom_id, c in by_id.items()},
+            max_tokens=1500
+        )
+        failed = set(by_id) - set(evaluations)
+
+        # Reviewer-evaluator loop, one batch per stage for all candidates not yet approved
+        pending = [custom_id for custom_id in by_id if custom_id in evaluations]
+        if self.policy.is_fast_mode(role):
+            logger.info("⚡ Fast mode for role %s: recording the initial evaluations without review", role['title'])
+            self.policy.record_saving("fast_mode", self.policy.remaining_calls(1), len(pending))
+            pending = []
+        current_iteration = 1
+        while pending and current_iteration <= self.max_iterations:
+            logger.info("🔄 BATCH REVIEW CYCLE: Iteration #%d, %d candidates", current_iteration, len(pending))
+            reviews = self._run_batch(
+                self.reviewer,
+                {
+                    custom_id: self.reviewer._build_prompt(evaluations[custom_id], by_id[custom_id], role, current_iteration)
+                    for custom_id in pending
+                },
+                max_tokens=1000
+            )
+            rejected = []
+            for custom_id in pending:
+                if custom_id not in reviews:
+                    failed.add(custom_id)
+                    continue
+                review_history[custom_id].append(reviews[custom_id])
+                if reviews[custom_id].get('status') != 'approved':
+                    rejected.append(custom_id)
+            logger.info("✅ %d approved, %d need improvement", len(reviews) - len(rejected), len(rejected))
+            if not rejected:
+                break
+            # Re-evaluations after the final review would never be reviewed
+            if current_iteration == self.max_iterations:
+                self.policy.record_saving("final_evaluation", 1, len(rejected))
+                break
+
+            improved = self._run_batch(
+                self.evaluator,
+                {
+                    custom_id: self.evaluator._build_prompt(by_id[custom_id], role, reviews[custom_id])
+                    for custom_id in rejected
+                },
+                max_tokens=1500
+            )
+            current_iteration += 1
+            pending = []
+            stable = 0
+            for custom_id in rejected:
+                if custom_id not in improved:
+                    failed.add(custom_id)
+                    continue
+                iterations[custom_id] = current_iteration
+                if self.policy.is_stable(evaluations[custom_id], improved[custom_id]):
+                    stable += 1
+                else:
+                    pending.append(custom_id)
+                evaluations[custom_id] = improved[custom_id]
+            if stable:
+                self.policy.record_saving("score_stable", self.policy.remaining_calls(current_iteration), stable)
+
+        logger.info("🗃️ BATCH: Recording final evaluations...")
+        evaluation_ids = {}
+        for custom_id, candidate in by_id.items():
+            if custom_id in failed:
+                evaluation_ids[candidate['id']] = None
+                continue
+            evaluation_ids[candidate['id']] = self.recorder._store_evaluation(
+                candidate,
+                role,
+                evaluations[custom_id],
+                self.recorder.parse_evaluation(evaluations[custom_id], candidate, review_history[custom_id]),
+                iterations[custom_id],
+                replace=True
+            )
+        if failed:
+            logger.warning(
+                "⚠️ BATCH: %d candidates kept their previous evaluation because a batch request failed: %s",
+                len(failed), ", ".join(by_id[custom_id]['email'] for custom_id in by_id if custom_id in failed)
+            )
+        logger.info("✅ BATCH: Re-screened %d candidates for role %s", len(evaluation_ids) - len(failed), role['title'])
+        return evaluation_ids
+
+    def _run_batch(self, agent, prompts, max_tokens):
+        """Submit one request per prompt, wait for the batches to end and parse each result with the agent.
+
+        Only succeeded requests are in the returned {custom_id: result}; errored,
+        expired, canceled and missing ones are logged and left out.
+        """
+        requests = [
+            {"custom_id": custom_id, "params": agent._build_request(prompt, max_tokens, agent.system_prompt)}
+            for custom_id, prompt in prompts.items()
+        ]
+        batch_ids = []
+        for start in range(0, len(requests), self.max_requests):
+            batch = self.anthropic_client.messages.batches.create(requests=requests[start:start + self.max_requests])
+            logger.info(
+                "📦 %s: Submitted batch %s (%d requests)",
+                agent.__class__.__name__, batch.id, len(requests[start:start + self.max_requests])
+            )
+            batch_ids.append(batch.id)
+
+        results = {}
+        returned = set()
+        for batch_id in batch_ids:
+            self._wait_for_batch(batch_id)
+            for entry in self.anthropic_client.messages.batches.results(batch_id):
+                returned.add(entry.custom_id)
+                if entry.result.type != "succeeded":
+                    logger.error("❌ %s: Request %s %s", agent.__class__.__name__, entry.custom_id, entry.result.type)
+                    continue
+                results[entry.custom_id] = agent._parse_response(agent._response_text(entry.result.message))
+
+        missing = [custom_id for custom_id in prompts if custom_id not in returned]
+        for custom_id in missing:
+            logger.error("❌ %s: Request %s has no result", agent.__class__.__name__, custom_id)
+        return results
+
+    def _wait_for_batch(self, batch_id):
+        """Poll a batch until it has finished processing"""
+        while True:
+            batch = self.anthropic_client.messages.batches.retrieve(batch_id)
+            if batch.processing_status == "ended":
+                logger.info("📦 Batch %s ended: %s", batch_id, batch.request_counts)
+                return batch
+            time.sleep(self.poll_interval)
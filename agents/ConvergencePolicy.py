@@ -0,0 +1,69 @@
+from .EvaluatorAgent import SCORE_FIELDS
+from logger import get_logger
+
+import collections
+import os
+import threading
+from dotenv import load_dotenv
+
+dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env')
+load_dotenv(dotenv_path)
+REVIEW_MAX_ITERATIONS = int(os.getenv('REVIEW_MAX_ITERATIONS', '3'))
+SCORE_STABILITY_THRESHOLD = float(os.getenv('SCORE_STABILITY_THRESHOLD', '2'))
+FAST_MODE_ROLES = [title.strip() for title in os.getenv('FAST_MODE_ROLES', '').split(',') if title.strip()]
+
+logger = get_logger(__name__)
+
+def score_delta(previous, current):
+    """Largest score change between two evaluations, as a percentage of each field's range.
+
+    Returns None when either evaluation is missing a score (e.g. a parse error),
+    so a broken evaluation is never mistaken for a stable one.
+    """
+    deltas = []
+    for field, (low, high) in SCORE_FIELDS.items():
+        before, after = previous.get(field), current.get(field)
+        if not isinstance(before, (int, float)) or not isinstance(after, (int, float)):
+            return None
+        deltas.append(abs(after - before) * 100 / (high - low))
+    return max(deltas)
+
+class ConvergencePolicy:
+    """Decides when the evaluator/reviewer loop can stop and counts the LLM calls each rule saves"""
+
+    def __init__(self, max_iterations=REVIEW_MAX_ITERATIONS, threshold=SCORE_STABILITY_THRESHOLD,
+                 fast_mode_roles=FAST_MODE_ROLES):
+        self.max_iterations = max_iterations
+        self.threshold = threshold
+        self.fast_mode_roles = set(fast_mode_roles)
+        self.calls_saved = collections.Counter()
+        self._lock = threading.Lock()
+
+    def is_fast_mode(self, role):
+        """Single-pass roles are recorded straight from the first evaluation, without review"""
+        return bool(role.get('fast_mode')) or role.get('title') in self.fast_mode_roles
+
+    def is_stable(self, previous, current):
+        """True when a re-evaluation moved no score by threshold percent or more"""
+        delta = score_delta(previous, current)
+        return delta is not None and delta < self.threshold
+
+    def remaining_calls(self, iteration):
+        """LLM calls the full loop would still make from the review of iteration on.
+
+        That is one review per iteration up to max_iterations and one re-evaluation
+        between consecutive reviews, assuming every review rejects.
+        """
+        return 2 * (self.max_iterations - iteration) + 1
+
+    def record_saving(self, rule, calls, count=1):
+        """Add calls saved by a rule (prefilter, fast_mode, score_stable or final_evaluation) and log it.
+
+        fast_mode and score_stable count remaining_calls from the next review on,
+        and prefilter adds the initial evaluation to that; final_evaluation is always
+        exactly one call.
+        """
+        with self._lock:
+            self.calls_saved[rule] += calls * count
+            total = sum(self.calls_saved.values())
+        logger.info("💡 CONVERGENCE: %s saved %d LLM call(s) (%d saved so far)", rule, calls * count, total)
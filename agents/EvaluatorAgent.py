@@ -1,60 +1,13 @@
 import json
 import datetime
-from .BaseAgent import Agent
+from .BaseAgent import Agent, ResponseParseError, cached_text_block
+from logger import get_logger, LazyJSON
 
-def log_step(message):
-    """Print a timestamped log message"""
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {message}")
+logger = get_logger(__name__)
 
 
-class EvaluatorAgent(Agent):
-    def evaluate(self, candidate, role, review=None):
-        """Evaluates candidate based on resume and job requirements"""
-        log_step("EVALUATOR: Starting evaluation")
-        
-        guidance_section = ""
-        if review:
-            feedback = review.get('feedback', '')
-            improvement_areas = review.get('improvement_areas', [])
-            
-            if feedback:
-                log_step(f"📝 Incorporating feedback: {feedback[:200]}...")
-                guidance_section += f"""
-                Previous review feedback:
-                {feedback}
-                """
-            
-            if improvement_areas and isinstance(improvement_areas, list) and len(improvement_areas) > 0:
-                log_step(f"📋 Incorporating improvement areas: {', '.join(improvement_areas)}")
-                guidance_section += "\nSpecific areas to improve:\n"
-                for i, area in enumerate(improvement_areas):
-                    guidance_section += f"{i+1}. {area}\n"
-            
-            if guidance_section:
-                guidance_section += "\nPlease address this feedback in your updated evaluation."
-        
-        current_date = datetime.datetime.now()
-        current_year = current_date.year
-        current_month = current_date.month
-        
-        requirements_formatted = role["description"]
-        
-        prompt = f"""
-        I'm evaluating a candidate for a {role['title']} position.
-
-        Job Requirements:
-        {requirements_formatted}
-        
-        Candidate Information:
-        Name: {candidate['first_name']} {candidate['last_name']}
-        
-        Resume:
-        {candidate["resume"]}
-        
-        {guidance_section}
-        
-        Today's exact date is {current_month}/{current_date.day}/{current_year}. Use this for precise experience calculations.
+SYSTEM_PROMPT = """
+        You are an expert recruiter evaluating candidates against job requirements.
         
         Please evaluate this candidate with the following approach:
         
@@ -124,28 +77,160 @@ class EvaluatorAgent(Agent):
         - Any transferable skills or experience that contribute to this dimension
         - A calculation of years of relevant experience where applicable
         
-        CRITICAL: Your response MUST be a valid JSON object with no formatting errors. 
-        Ensure all keys and string values are in double quotes.
-        Do not include any explanations or markdown formatting outside the JSON object.
+        Record your evaluation by calling the record_evaluation tool. Put each score in its own
+        field, the per-dimension evidence in "evidence", the experience calculation in
+        "experience_calculation" and a concise summary of strengths, weaknesses and fit in
+        "analysis_notes".
         """
-        
-        response_text = self._call_llm(prompt, max_tokens=1500)
-        
-        # Extract JSON from response
+
+SCORE_FIELDS = {
+    "technical_skills": (1, 10),
+    "experience_level": (1, 10),
+    "domain_knowledge": (1, 10),
+    "culture_fit": (1, 10),
+    "overall_match": (0, 100),
+}
+
+EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        **{
+            field: {"type": "number", "minimum": low, "maximum": high}
+            for field, (low, high) in SCORE_FIELDS.items()
+        },
+        "analysis_notes": {
+            "type": "string",
+            "description": "Concise summary of strengths, weaknesses, and fit"
+        },
+        "experience_calculation": {
+            "type": "string",
+            "description": "Years of relevant experience per position and in total"
+        },
+        "evidence": {
+            "type": "object",
+            "description": "Evidence from the resume supporting each dimension score, keyed by dimension",
+            "additionalProperties": {"type": "string"}
+        }
+    },
+    "required": list(SCORE_FIELDS) + ["analysis_notes"]
+}
+
+EVALUATION_TOOL = {
+    "name": "record_evaluation",
+    "description": "Record the scores and supporting evidence for a candidate evaluation",
+    "input_schema": EVALUATION_SCHEMA
+}
+
+
+def validate_evaluation(evaluation):
+    """Check an evaluation against EVALUATION_SCHEMA; raises ValueError on the first problem"""
+    if not isinstance(evaluation, dict):
+        raise ValueError("Evaluation must be a JSON object")
+    for field in EVALUATION_SCHEMA["required"]:
+        if field not in evaluation:
+            raise ValueError(f"Missing field: {field}")
+    for field, (low, high) in SCORE_FIELDS.items():
+        value = evaluation[field]
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{field} must be a number, got {value!r}")
+        if not low <= value <= high:
+            raise ValueError(f"{field} must be between {low} and {high}, got {value}")
+    if not isinstance(evaluation["analysis_notes"], str):
+        raise ValueError("analysis_notes must be a string")
+    return evaluation
+
+
+class EvaluatorAgent(Agent):
+    system_prompt = SYSTEM_PROMPT
+    tool = EVALUATION_TOOL
+    
+    def evaluate(self, candidate, role, review=None):
+        """Evaluates candidate based on resume and job requirements"""
+        logger.info("EVALUATOR: Starting evaluation")
+        prompt = self._build_prompt(candidate, role, review)
+        try:
+            return self._call_llm(prompt, max_tokens=1500, system=self.system_prompt, parse=self._parse_json)
+        except ResponseParseError as e:
+            return self._parse_fallback(e)
+    
+    async def aevaluate(self, candidate, role, review=None):
+        """Async version of evaluate"""
+        logger.info("EVALUATOR: Starting evaluation")
+        prompt = self._build_prompt(candidate, role, review)
         try:
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            json_str = response_text[json_start:json_end]
-            evaluation = json.loads(json_str)
-            log_step("✅ Successfully parsed evaluation results")
+            return await self._acall_llm(prompt, max_tokens=1500, system=self.system_prompt, parse=self._parse_json)
+        except ResponseParseError as e:
+            return self._parse_fallback(e)
+    
+    def _build_prompt(self, candidate, role, review=None):
+        """Build the evaluation prompt, including any reviewer feedback"""
+        guidance_section = ""
+        if review:
+            feedback = review.get('feedback', '')
+            improvement_areas = review.get('improvement_areas', [])
             
-            # Print summary of evaluation
-            log_step("Evaluation Summary:")
-            for key, value in evaluation.items():
-                if isinstance(value, (int, float)) and key != "error":
-                    log_step(f"  - {key}: {value}")
+            if feedback:
+                logger.debug("📝 Incorporating feedback: %s...", feedback[:200])
+                guidance_section += f"""
+                Previous review feedback:
+                {feedback}
+                """
+            
+            if improvement_areas and isinstance(improvement_areas, list) and len(improvement_areas) > 0:
+                logger.debug("📋 Incorporating improvement areas: %s", ', '.join(improvement_areas))
+                guidance_section += "\nSpecific areas to improve:\n"
+                for i, area in enumerate(improvement_areas):
+                    guidance_section += f"{i+1}. {area}\n"
             
-            return evaluation
-        except Exception as e:
-            log_step(f"❌ Error parsing evaluator response: {e}")
-            return {"error": "Failed to parse evaluation"}
\ No newline at end of file
+            if guidance_section:
+                guidance_section += "\nPlease address this feedback in your updated evaluation."
+        
+        current_date = datetime.datetime.now()
+        current_year = current_date.year
+        current_month = current_date.month
+        
+        requirements_formatted = role["description"]
+        
+        role_section = f"""
+        I'm evaluating a candidate for a {role['title']} position.
+
+        Job Requirements:
+        {requirements_formatted}
+        """
+        
+        candidate_section = f"""
+        Candidate Information:
+        Name: {candidate['first_name']} {candidate['last_name']}
+        
+        Resume:
+        {candidate["resume"]}
+        
+        {guidance_section}
+        
+        Today's exact date is {current_month}/{current_date.day}/{current_year}. Use this for precise experience calculations.
+        """
+        
+        # The role section is identical for every candidate of a role, so it is cached
+        prompt = [
+            cached_text_block(role_section),
+            {"type": "text", "text": candidate_section}
+        ]
+        return prompt
+    
+    def _parse_json(self, response_text):
+        """Extract the evaluation JSON from the LLM response; raises if it is missing or invalid"""
+        json_start = response_text.find('{')
+        json_end = response_text.rfind('}') + 1
+        json_str = response_text[json_start:json_end]
+        evaluation = validate_evaluation(json.loads(json_str))
+        logger.debug("✅ Successfully parsed evaluation results")
+        
+        logger.debug("Evaluation Summary: %s", LazyJSON(
+            {key: value for key, value in evaluation.items() if isinstance(value, (int, float))}, indent=None
+        ))
+        
+        return evaluation
+    
+    def _parse_fallback(self, error):
+        logger.error("❌ Error parsing evaluator response: %s", error)
+        return {"error": "Failed to parse evaluation"}
@@ -0,0 +1,223 @@
+import anthropic
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from dotenv import load_dotenv
+from logger import get_logger
+
+dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env')
+load_dotenv(dotenv_path)
+LLM_RPM_LIMIT = int(os.getenv('LLM_RPM_LIMIT', '50'))
+LLM_TPM_LIMIT = int(os.getenv('LLM_TPM_LIMIT', '80000'))
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '16'))
+LLM_MIN_CONCURRENCY = int(os.getenv('LLM_MIN_CONCURRENCY', '1'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '6'))
+LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', '1'))
+LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', '60'))
+
+# 429 rate limited, 529 overloaded: back off concurrency as well as retrying
+THROTTLE_STATUS_CODES = (429, 529)
+RETRY_STATUS_CODES = THROTTLE_STATUS_CODES + (408, 500, 502, 503, 504)
+# Polling step while waiting for a concurrency slot
+SLOT_POLL_INTERVAL = 0.05
+
+logger = get_logger(__name__)
+
+class TokenBucket:
+    """Refills capacity units per minute; not thread-safe on its own, RateLimiter holds the lock"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until amount units are available (0 if they are now)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+    def give_back(self, amount):
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class RateLimiter:
+    """Process-wide limiter for Messages API calls.
+
+    Requests wait for a slot under an adaptive concurrency limit (halved on
+    429/529, increased by about one per limit's worth of successes) and for
+    both a requests-per-minute and a tokens-per-minute bucket. Retryable
+    failures are retried with jittered exponential backoff, honouring the
+    retry-after header, and a throttling response pauses every caller.
+    """
+
+    def __init__(self, rpm=LLM_RPM_LIMIT, tpm=LLM_TPM_LIMIT, max_concurrency=LLM_MAX_CONCURRENCY,
+                 min_concurrency=LLM_MIN_CONCURRENCY, max_retries=LLM_MAX_RETRIES,
+                 backoff_base=LLM_BACKOFF_BASE, backoff_max=LLM_BACKOFF_MAX):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = float(max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.counters = {"requests": 0, "retries": 0, "throttled": 0, "failed": 0}
+        self._lock = threading.Lock()
+
+    def estimate_tokens(self, request):
+        """Rough token cost of a request: about 4 characters per input token plus max_tokens of output"""
+        text = json.dumps([request.get("system"), request.get("messages"), request.get("tools")])
+        return len(text) // 4 + request.get("max_tokens", 0)
+
+    def _try_acquire(self, tokens):
+        """Take a slot and the bucket units if all are available; otherwise return seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            if self.paused_until > now:
+                return self.paused_until - now
+            if self.in_flight >= int(self.concurrency):
+                return SLOT_POLL_INTERVAL
+            wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+            if wait > 0:
+                return wait
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.in_flight += 1
+            self.counters["requests"] += 1
+            return 0.0
+
+    def acquire(self, tokens):
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def aacquire(self, tokens):
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _on_success(self, message, estimate):
+        usage = getattr(message, 'usage', None)
+        with self._lock:
+            self.in_flight -= 1
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+            if usage is not None:
+                used = (usage.input_tokens + usage.output_tokens
+                        + (getattr(usage, 'cache_creation_input_tokens', None) or 0))
+                # Refund the over-estimate, or charge the difference
+                self.tokens.give_back(estimate - used)
+
+    def _on_error(self, error, attempt):
+        """Release the slot and return the delay before retrying, or None when the error is final"""
+        status = getattr(error, 'status_code', None)
+        retryable = status in RETRY_STATUS_CODES or isinstance(error, anthropic.APIConnectionError)
+        retry_after = self._retry_after(error)
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = retry_after + random.uniform(0, self.backoff_base)
+        with self._lock:
+            self.in_flight -= 1
+            if status in THROTTLE_STATUS_CODES:
+                self.counters["throttled"] += 1
+                self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+                self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            if not retryable or attempt >= self.max_retries:
+                self.counters["failed"] += 1
+                return None
+            self.counters["retries"] += 1
+        return delay
+
+    def _retry_after(self, error):
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None) or {}
+        try:
+            if headers.get('retry-after-ms'):
+                return float(headers['retry-after-ms']) / 1000
+            if headers.get('retry-after'):
+                return float(headers['retry-after'])
+        except ValueError:
+            pass
+        return None
+
+    def call(self, create, request):
+        """Run create(**request) under the limits, retrying retryable errors"""
+        estimate = self.estimate_tokens(request)
+        attempt = 0
+        while True:
+            self.acquire(estimate)
+            try:
+                message = create(**request)
+            except (KeyboardInterrupt, asyncio.CancelledError):
+                self._release()
+                raise
+            except Exception as e:
+                delay = self._on_error(e, attempt)
+                if delay is None:
+                    raise
+                logger.warning("⏳ RATE LIMITER: %s, retry %d/%d in %.1fs (concurrency %d)",
+                               e.__class__.__name__, attempt + 1, self.max_retries, delay, int(self.concurrency))
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self._on_success(message, estimate)
+            return message
+
+    async def acall(self, create, request):
+        """Async version of call; waits with asyncio.sleep so the event loop keeps running"""
+        estimate = self.estimate_tokens(request)
+        attempt = 0
+        while True:
+            await self.aacquire(estimate)
+            try:
+                message = await create(**request)
+            except (KeyboardInterrupt, asyncio.CancelledError):
+                self._release()
+                raise
+            except Exception as e:
+                delay = self._on_error(e, attempt)
+                if delay is None:
+                    raise
+                logger.warning("⏳ RATE LIMITER: %s, retry %d/%d in %.1fs (concurrency %d)",
+                               e.__class__.__name__, attempt + 1, self.max_retries, delay, int(self.concurrency))
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self._on_success(message, estimate)
+            return message
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, in_flight=self.in_flight, concurrency=round(self.concurrency, 2))
+
+
+_shared_limiter = None
+_shared_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """Return the process-wide RateLimiter, creating it on first use"""
+    global _shared_limiter
+    with _shared_limiter_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter()
+        return _shared_limiter
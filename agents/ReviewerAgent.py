@@ -1,37 +1,13 @@
 import json
 import datetime
-from .BaseAgent import Agent
+from .BaseAgent import Agent, ResponseParseError, cached_text_block
+from logger import get_logger
 
-def log_step(message):
-    """Print a timestamped log message"""
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {message}")
+logger = get_logger(__name__)
 
-class ReviewerAgent(Agent):
-    def review(self, evaluation, candidate, role, iteration):
-        """Reviews the evaluation for thoroughness and accuracy"""
-        log_step(f"🔍 REVIEWER: Starting review (Iteration #{iteration})")
-        
-        requirements_formatted = role["description"]
-        
-        current_date = datetime.datetime.now()
-        current_year = current_date.year
-        current_month = current_date.month
-        
-        prompt = f"""
-        You are a hiring manager reviewing an AI evaluation of a candidate for a {role['title']} position.
+SYSTEM_PROMPT = """
+        You are a hiring manager reviewing an AI evaluation of a candidate.
         Your task is to ensure the evaluation is accurate, well-reasoned, and fair.
-
-        Today's exact date is {current_month}/{current_date.day}/{current_year}.
-
-        Job Requirements:
-        {requirements_formatted}
-        
-        AI Evaluation (Iteration #{iteration}):
-        {json.dumps(evaluation, indent=2)}
-        
-        Original Resume Text:
-        {candidate["resume"]}
         
         Please review the evaluation with these principles in mind:
         
@@ -75,17 +51,17 @@ class ReviewerAgent(Agent):
         - Every score should be justified with specific evidence
         
         If the evaluation is thorough, accurate, and fair, respond with:
-        {{
+        {
             "status": "approved",
             "comments": "Your specific comments on the strengths of this evaluation"
-        }}
+        }
         
         If the evaluation needs improvement, respond with:
-        {{
+        {
             "status": "needs_improvement",
             "feedback": "Clear, specific feedback on what needs to be corrected or improved",
             "improvement_areas": ["List specific areas that need attention"]
-        }}
+        }
         
         For the first iteration, be especially attentive to areas that could be enhanced,
         but judge based on substantive issues rather than seeking problems unnecessarily.
@@ -95,23 +71,75 @@ class ReviewerAgent(Agent):
         Ensure all keys and string values are in double quotes.
         Do not include any explanations or markdown formatting outside the JSON object.
         """
+
+class ReviewerAgent(Agent):
+    system_prompt = SYSTEM_PROMPT
+    
+    def review(self, evaluation, candidate, role, iteration):
+        """Reviews the evaluation for thoroughness and accuracy"""
+        logger.info("🔍 REVIEWER: Starting review (Iteration #%d)", iteration)
+        prompt = self._build_prompt(evaluation, candidate, role, iteration)
+        try:
+            return self._call_llm(prompt, max_tokens=1000, system=self.system_prompt, parse=self._parse_json)
+        except ResponseParseError as e:
+            return self._parse_fallback(e)
+    
+    async def areview(self, evaluation, candidate, role, iteration):
+        """Async version of review"""
+        logger.info("🔍 REVIEWER: Starting review (Iteration #%d)", iteration)
+        prompt = self._build_prompt(evaluation, candidate, role, iteration)
+        try:
+            return await self._acall_llm(prompt, max_tokens=1000, system=self.system_prompt, parse=self._parse_json)
+        except ResponseParseError as e:
+            return self._parse_fallback(e)
+    
+    def _build_prompt(self, evaluation, candidate, role, iteration):
+        """Build the review prompt for one evaluation"""
+        requirements_formatted = role["description"]
+        
+        current_date = datetime.datetime.now()
+        current_year = current_date.year
+        current_month = current_date.month
+        
+        role_section = f"""
+        The evaluation is for a {role['title']} position.
+
+        Job Requirements:
+        {requirements_formatted}
+        """
         
-        response_text = self._call_llm(prompt, max_tokens=1000)
+        evaluation_section = f"""
+        Today's exact date is {current_month}/{current_date.day}/{current_year}.
         
-        # Extract JSON from response
-        try:
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            json_str = response_text[json_start:json_end]
-            review = json.loads(json_str)
-            
-            log_step(f"📝 Review Status: {review.get('status', 'unknown')}")
-            if review.get('status') == 'approved':
-                log_step(f"✅ Review approved with comment: {review.get('comments', '')[:100]}...")
-            elif review.get('status') == 'needs_improvement':
-                log_step(f"🔄 Improvements needed: {review.get('feedback', '')[:100]}...")
-            
-            return review
-        except Exception as e:
-            log_step(f"❌ Error parsing reviewer response: {e}")
-            return {"status": "error", "message": str(e)}
\ No newline at end of file
+        AI Evaluation (Iteration #{iteration}):
+        {json.dumps(evaluation, indent=2)}
+        
+        Original Resume Text:
+        {candidate["resume"]}
+        """
+        
+        # The role section is identical for every candidate of a role, so it is cached
+        prompt = [
+            cached_text_block(role_section),
+            {"type": "text", "text": evaluation_section}
+        ]
+        return prompt
+    
+    def _parse_json(self, response_text):
+        """Extract the review JSON from the LLM response; raises if it is not valid JSON"""
+        json_start = response_text.find('{')
+        json_end = response_text.rfind('}') + 1
+        json_str = response_text[json_start:json_end]
+        review = json.loads(json_str)
+        
+        logger.info("📝 Review Status: %s", review.get('status', 'unknown'))
+        if review.get('status') == 'approved':
+            logger.info("✅ Review approved with comment: %s...", review.get('comments', '')[:100])
+        elif review.get('status') == 'needs_improvement':
+            logger.info("🔄 Improvements needed: %s...", review.get('feedback', '')[:100])
+        
+        return review
+    
+    def _parse_fallback(self, error):
+        logger.error("❌ Error parsing reviewer response: %s", error)
+        return {"status": "error", "message": str(error)}
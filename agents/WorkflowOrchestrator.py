@@ -2,95 +2,313 @@ from .EvaluatorAgent import EvaluatorAgent
 from .ReviewerAgent import ReviewerAgent
 from .RecorderAgent import RecorderAgent
 from .BaseAgent import Agent
+from .ConvergencePolicy import ConvergencePolicy
+from utils import extract_resume
+from db.db_helper import create_evaluation
+from text_index import PREFILTER_THRESHOLD, role_similarity
+from tracing import span, trace_context
+from logger import get_logger, LazyJSON
 
-import json
-import datetime
+import asyncio
 import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
 
-def log_step(message):
-    """Print a timestamped log message"""
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {message}")
+dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env')
+load_dotenv(dotenv_path)
+MAX_CONCURRENT_WORKFLOWS = int(os.getenv('MAX_CONCURRENT_WORKFLOWS', '50'))
+MAX_ROLE_WORKERS = int(os.getenv('MAX_ROLE_WORKERS', '4'))
+
+logger = get_logger(__name__)
 
 class WorkflowOrchestrator:
-    def __init__(self, anthropic_client):
+    def __init__(self, anthropic_client, async_client=None, max_concurrency=MAX_CONCURRENT_WORKFLOWS, policy=None,
+                 prefilter_threshold=PREFILTER_THRESHOLD):
         self.anthropic_client = anthropic_client
-        self.evaluator = EvaluatorAgent(anthropic_client)
-        self.reviewer = ReviewerAgent(anthropic_client)
-        self.recorder = RecorderAgent(anthropic_client)
-        self.max_iterations = 3
+        self.async_client = async_client
+        self.evaluator = EvaluatorAgent(anthropic_client, async_client)
+        self.reviewer = ReviewerAgent(anthropic_client, async_client)
+        self.recorder = RecorderAgent(anthropic_client, async_client)
+        self.policy = policy or ConvergencePolicy()
+        self.max_iterations = self.policy.max_iterations
+        self.max_concurrency = max_concurrency
+        self.prefilter_threshold = prefilter_threshold
+        # asyncio.Semaphore binds to the loop it is first used on, so each event loop gets its own
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._semaphores_lock = threading.Lock()
     
     def process_new_candidate(self, candidate, role):
         """Process a candidate for a specific role"""
-        log_step(f"🚀 ORCHESTRATOR: Starting workflow for candidate {candidate['email']} and role {role['title']}")
+        logger.info("🚀 ORCHESTRATOR: Starting workflow for candidate %s and role %s", candidate['email'], role['title'])
         
         # Start evaluation process
         result = self.evaluate_candidate(candidate, role)
         
         return result
     
+    def process_candidate_for_roles(self, candidate, roles, max_workers=MAX_ROLE_WORKERS):
+        """Evaluate one candidate against several roles in parallel; returns the role fits, best match first"""
+        logger.info("🚀 ORCHESTRATOR: Starting workflow for candidate %s and %d roles", candidate['email'], len(roles))
+        if not candidate.get('resume') and candidate.get('resume_url'):
+            logger.info("📄 Extracting resume once for all roles...")
+            candidate = dict(candidate, resume=extract_resume(candidate['resume_url']))
+        
+        provisional = [self._prefilter(candidate, role) for role in roles]
+        to_review = [role for role, record in zip(roles, provisional) if record is None]
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(to_review)))) as pool:
+            reviewed = list(pool.map(lambda role: self._review_candidate(candidate, role), to_review))
+        
+        results, records = self._build_role_records(candidate, roles, provisional, reviewed)
+        logger.info("🗃️ Recording %d evaluations in one transaction...", len(records))
+        evaluation_ids = self.recorder.store_evaluations(records)
+        return self._rank_role_fits(roles, results, records, evaluation_ids)
+    
+    def _build_role_records(self, candidate, roles, provisional, reviewed):
+        """Pair each role with its loop result and evaluations row; pre-filtered roles keep their provisional row"""
+        reviewed = iter(reviewed)
+        results = []
+        records = []
+        for role, record in zip(roles, provisional):
+            if record is None:
+                evaluation, review_history, iterations = result = next(reviewed)
+                record = self.recorder.build_evaluation_record(
+                    candidate,
+                    role,
+                    evaluation,
+                    self.recorder.parse_evaluation(evaluation, candidate, review_history),
+                    iterations
+                )
+            else:
+                result = (record, [], 0)
+            results.append(result)
+            records.append(record)
+        return results, records
+    
+    def _trace_tags(self, candidate, role):
+        """Tags attached to every trace span of one candidate/role workflow; the id rather than the email keeps trace files free of personal data"""
+        return {"candidate_id": candidate.get('id'), "role": role.get('title'), "role_id": role.get('id')}
+    
+    def _prefilter(self, candidate, role):
+        """Provisional "Do not proceed" row when the resume is lexically far from the role, otherwise None"""
+        if self.prefilter_threshold <= 0 or not candidate.get('resume'):
+            return None
+        similarity = role_similarity(candidate['resume'], role)
+        if similarity >= self.prefilter_threshold:
+            logger.info("🔎 PRE-FILTER: Similarity %.3f for role %s, running full evaluation", similarity, role['title'])
+            return None
+        
+        logger.info("🔎 PRE-FILTER: Similarity %.3f below %s for role %s, skipping LLM evaluation",
+                    similarity, self.prefilter_threshold, role['title'])
+        self.policy.record_saving("prefilter", 1 + self.policy.remaining_calls(1))
+        return {
+            'candidate_id': candidate.get('id', 0),
+            'role_id': role.get('id', 0),
+            'technical_skills': 0,
+            'experience_level': 0,
+            'domain_knowledge': 0,
+            'culture_fit': 0,
+            'overall_match': 0,
+            'recommendation': "Do not proceed",
+            'analysis_notes': (
+                f"Provisional: screened out by the lexical pre-filter (similarity {similarity:.3f}, "
+                f"threshold {self.prefilter_threshold}). No LLM evaluation was run."
+            )
+        }
+    
+    def _rank_role_fits(self, roles, results, records, evaluation_ids):
+        role_fits = [
+            {
+                'role_id': role.get('id'),
+                'title': role['title'],
+                'overall_match': record['overall_match'],
+                'recommendation': record['recommendation'],
+                'evaluation_id': evaluation_id,
+                'evaluation': evaluation
+            }
+            for role, (evaluation, _, _), record, evaluation_id in zip(roles, results, records, evaluation_ids)
+        ]
+        role_fits.sort(key=lambda fit: fit['overall_match'] or 0, reverse=True)
+        for fit in role_fits:
+            logger.info("🏅 %s: %s%% (%s)", fit['title'], fit['overall_match'], fit['recommendation'])
+        return role_fits
+    
     def evaluate_candidate(self, candidate, role):
         """Evaluate a candidate for a specific role"""
-        log_step(f"🔄 ORCHESTRATOR: Evaluating candidate {candidate['email']} for role {role['title']}")
+        with trace_context(**self._trace_tags(candidate, role)), span("workflow.evaluate_candidate"):
+            provisional = self._prefilter(candidate, role)
+            if provisional is not None:
+                evaluation_id = create_evaluation(provisional['candidate_id'], provisional['role_id'], provisional)
+                logger.info("✅ Provisional evaluation recorded with ID: %s", evaluation_id)
+                return provisional
+            
+            evaluation, review_history, current_iteration = self._review_candidate(candidate, role)
+            
+            # Record the final evaluation
+            logger.info("🗃️ Recording final evaluation...")
+            self.recorder.record_evaluation(
+                candidate,
+                role,
+                evaluation,
+                review_history,
+                current_iteration
+            )
+            
+            return evaluation
+    
+    def _review_candidate(self, candidate, role):
+        """Run the evaluator/reviewer loop; returns (evaluation, review_history, iterations) without recording"""
+        with trace_context(**self._trace_tags(candidate, role)):
+            steps = self._review_steps(candidate, role)
+            try:
+                request = next(steps)
+                while True:
+                    agent, method, args = request
+                    try:
+                        result = getattr(agent, method)(*args)
+                    except Exception as e:
+                        # Raised inside the loop, so the open review_iteration span records the failure
+                        request = steps.throw(e)
+                    else:
+                        request = steps.send(result)
+            except StopIteration as done:
+                return done.value
+    
+    def _review_steps(self, candidate, role):
+        """The evaluator/reviewer loop as a generator shared by the sync and async drivers.
+
+        Yields (agent, method, args) for each LLM call, e.g. (self.reviewer,
+        "review", (...)), and is sent the call's result; the async driver awaits
+        the "a"-prefixed twin of the method. Returns (evaluation, review_history, iterations).
+        """
+        logger.info("🔄 ORCHESTRATOR: Evaluating candidate %s for role %s", candidate['email'], role['title'])
         
         # Initial evaluation
-        log_step("🔄 Starting initial evaluation...")
-        evaluation = self.evaluator.evaluate(candidate, role)
+        logger.info("🔄 Starting initial evaluation...")
+        evaluation = yield self.evaluator, "evaluate", (candidate, role)
         
-        log_step("📊 Initial Evaluation:")
-        print(json.dumps(evaluation, indent=2))
+        logger.debug("📊 Initial Evaluation:\n%s", LazyJSON(evaluation))
         
         # Reviewer-evaluator loop
         current_iteration = 1
         review_history = []
         
-        while current_iteration <= self.max_iterations:
-            log_step(f"🔄 REVIEW CYCLE: Iteration #{current_iteration} of {self.max_iterations}")
-            
-            # Get review
-            review = self.reviewer.review(evaluation, candidate, role, current_iteration)
-            review_history.append(review)
-            
-            # Print review
-            log_step(f"🔍 Review #{current_iteration}:")
-            print(json.dumps(review, indent=2))
-            
-            # Check if approved
-            if review.get('status') == 'approved':
-                log_step(f"✅ Evaluation APPROVED after {current_iteration} iterations!")
-                break
+        fast_mode = self.policy.is_fast_mode(role)
+        if fast_mode:
+            logger.info("⚡ Fast mode for role %s: recording the initial evaluation without review", role['title'])
+            self.policy.record_saving("fast_mode", self.policy.remaining_calls(1))
+        
+        while not fast_mode:
+            with span("workflow.review_iteration", iteration=current_iteration):
+                logger.info("🔄 REVIEW CYCLE: Iteration #%d of %d", current_iteration, self.max_iterations)
                 
-            # Print warning if this is the final iteration
-            if current_iteration == self.max_iterations:
-                log_step(f"⚠️ Max iterations ({self.max_iterations}) reached. Performing final evaluation.")
-    
+                # Get review
+                review = yield self.reviewer, "review", (evaluation, candidate, role, current_iteration)
+                review_history.append(review)
                 
-            # Get improved evaluation based on review
-            log_step("🔄 Getting improved evaluation based on feedback...")
-            evaluation = self.evaluator.evaluate(
-                candidate, 
-                role,
-                review
-            )
-            
-            # Print updated evaluation
-            log_step(f"📊 Updated Evaluation (Iteration #{current_iteration + 1}):")
-            print(json.dumps(evaluation, indent=2))
-            
-            current_iteration += 1
-        
-        current_iteration = 3 if current_iteration > 3 else current_iteration
-        # Record the final evaluation
-        log_step("🗃️ Recording final evaluation...")
-        self.recorder.record_evaluation(
-            candidate,
-            role,
-            evaluation,
-            review_history,
-            current_iteration
-        )
+                # Log review
+                logger.debug("🔍 Review #%d:\n%s", current_iteration, LazyJSON(review))
+                
+                # Check if approved
+                if review.get('status') == 'approved':
+                    logger.info("✅ Evaluation APPROVED after %d iterations!", current_iteration)
+                    break
+                    
+                # A re-evaluation after the final review would never be reviewed, so keep the current one
+                if current_iteration == self.max_iterations:
+                    logger.warning("⚠️ Max iterations (%d) reached. Keeping the last reviewed evaluation.", self.max_iterations)
+                    self.policy.record_saving("final_evaluation", 1)
+                    break
+                    
+                # Get improved evaluation based on review
+                logger.info("🔄 Getting improved evaluation based on feedback...")
+                previous_evaluation = evaluation
+                evaluation = yield self.evaluator, "evaluate", (candidate, role, review)
+                current_iteration += 1
+                
+                # Log updated evaluation
+                logger.debug("📊 Updated Evaluation (Iteration #%d):\n%s", current_iteration, LazyJSON(evaluation))
+                
+                if self.policy.is_stable(previous_evaluation, evaluation):
+                    logger.info("✅ Scores stable within %s%% after %d iterations", self.policy.threshold, current_iteration)
+                    self.policy.record_saving("score_stable", self.policy.remaining_calls(current_iteration))
+                    break
         
-        #log_step(f"✅ ANALYSIS COMPLETE: Candidate {candidate['email']} processed after {current_iteration} iterations")
+        return evaluation, review_history, current_iteration
+    
+    async def aprocess_new_candidate(self, candidate, role):
+        """Async version of process_new_candidate, limited to max_concurrency workflows at once per event loop"""
+        loop = asyncio.get_running_loop()
+        with self._semaphores_lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        async with semaphore:
+            logger.info("🚀 ORCHESTRATOR: Starting workflow for candidate %s and role %s", candidate['email'], role['title'])
+            return await self.aevaluate_candidate(candidate, role)
+    
+    async def aprocess_candidates(self, pairs):
+        """Run the workflow for many (candidate, role) pairs on one event loop"""
+        tasks = [self.aprocess_new_candidate(candidate, role) for candidate, role in pairs]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def aprocess_candidate_for_roles(self, candidate, roles, max_workers=MAX_ROLE_WORKERS):
+        """Async version of process_candidate_for_roles, at most max_workers roles in flight"""
+        logger.info("🚀 ORCHESTRATOR: Starting workflow for candidate %s and %d roles", candidate['email'], len(roles))
+        if not candidate.get('resume') and candidate.get('resume_url'):
+            logger.info("📄 Extracting resume once for all roles...")
+            candidate = dict(candidate, resume=await asyncio.to_thread(extract_resume, candidate['resume_url']))
         
+        provisional = [await asyncio.to_thread(self._prefilter, candidate, role) for role in roles]
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+        async def review(role):
+            async with semaphore:
+                return await self._areview_candidate(candidate, role)
+        reviewed = await asyncio.gather(*(review(role) for role, record in zip(roles, provisional) if record is None))
         
-        return evaluation
\ No newline at end of file
+        results, records = self._build_role_records(candidate, roles, provisional, reviewed)
+        logger.info("🗃️ Recording %d evaluations in one transaction...", len(records))
+        evaluation_ids = await asyncio.to_thread(self.recorder.store_evaluations, records)
+        return self._rank_role_fits(roles, results, records, evaluation_ids)
+    
+    async def aevaluate_candidate(self, candidate, role):
+        """Async version of evaluate_candidate"""
+        with trace_context(**self._trace_tags(candidate, role)), span("workflow.evaluate_candidate"):
+            provisional = await asyncio.to_thread(self._prefilter, candidate, role)
+            if provisional is not None:
+                evaluation_id = await asyncio.to_thread(
+                    create_evaluation, provisional['candidate_id'], provisional['role_id'], provisional
+                )
+                logger.info("✅ Provisional evaluation recorded with ID: %s", evaluation_id)
+                return provisional
+            
+            evaluation, review_history, current_iteration = await self._areview_candidate(candidate, role)
+            
+            logger.info("🗃️ Recording final evaluation...")
+            await self.recorder.arecord_evaluation(
+                candidate,
+                role,
+                evaluation,
+                review_history,
+                current_iteration
+            )
+            
+            return evaluation
+    
+    async def _areview_candidate(self, candidate, role):
+        """Async version of _review_candidate, driving the same _review_steps loop"""
+        with trace_context(**self._trace_tags(candidate, role)):
+            steps = self._review_steps(candidate, role)
+            try:
+                request = next(steps)
+                while True:
+                    agent, method, args = request
+                    try:
+                        result = await getattr(agent, f"a{method}")(*args)
+                    except Exception as e:
+                        request = steps.throw(e)
+                    else:
+                        request = steps.send(result)
+            except StopIteration as done:
+                return done.value
@@ -7,6 +7,8 @@ from .EvaluatorAgent import EvaluatorAgent
 from .ReviewerAgent import ReviewerAgent
 from .RecorderAgent import RecorderAgent
 from .WorkflowOrchestrator import WorkflowOrchestrator
+from .BatchOrchestrator import BatchOrchestrator
+from .ConvergencePolicy import ConvergencePolicy
 
 # This allows users to do:
 # from agents import EvaluatorAgent, WorkflowOrchestrator
@@ -0,0 +1 @@
+# Offline benchmarks for the screening pipeline, run with: python -m benchmarks.bench_pipeline
@@ -0,0 +1,246 @@
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from benchmarks.fake_anthropic import FakeAnthropic, FakeAsyncAnthropic
+from benchmarks.fixtures import ROLES, serve_directory, write_resumes
+
+PATHS = ("orchestrator", "webhook")
+WEBHOOK_POLL_INTERVAL = 0.05
+
+
+def configure_environment(workdir, max_in_flight, keep_limits=False):
+    """Point the databases, caches and downloads at workdir.
+
+    The app reads its settings when its modules are imported, so this must run
+    before anything from the repository is imported.
+    """
+    os.environ.update({
+        "DATABASE_PATH": os.path.join(workdir, "talentnexus.db"),
+        "JOB_QUEUE_PATH": os.path.join(workdir, "jobs.db"),
+        "RESUME_CACHE_PATH": os.path.join(workdir, "resume_cache.db"),
+        "LLM_CACHE_PATH": os.path.join(workdir, "llm_cache.db"),
+        "TRACE_PATH": os.path.join(workdir, "traces.jsonl"),
+        "DOWNLOAD_DIR": os.path.join(workdir, "downloads"),
+        # Identical requests across runs would otherwise be answered from the response cache
+        "LLM_CACHE_BYPASS": "1",
+    })
+    os.environ.setdefault("TRACE_SINK", "none")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("LLM_MODEL", "benchmark-model")
+    os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark")
+    if not keep_limits:
+        # Measure the pipeline, not the account's rate limits
+        os.environ.update({
+            "LLM_RPM_LIMIT": str(10 ** 9),
+            "LLM_TPM_LIMIT": str(10 ** 12),
+            "LLM_MAX_CONCURRENCY": str(max_in_flight),
+        })
+    os.makedirs(os.environ["DOWNLOAD_DIR"], exist_ok=True)
+
+
+def setup_database():
+    """Apply the migrations to the temporary database and create the benchmark roles"""
+    from db.db_helper import create_role, get_connection, get_role
+    from db.migrations import apply_migrations
+
+    apply_migrations(get_connection())
+    for role in ROLES:
+        create_role({"title": role["title"], "description": role["description"], "url": "", "status": "Open"})
+    return [get_role(role["title"]) for role in ROLES]
+
+
+def seed_candidates(records):
+    """Store the fixture candidates with their resume text, as the Typeform import does"""
+    from db.db_helper import create_candidates_bulk
+
+    return list(create_candidates_bulk(records))
+
+
+def summarize(path, concurrency, latencies, wall, calls, failed=0):
+    p50, p95 = np.percentile(latencies, [50, 95]) if latencies else (float("nan"), float("nan"))
+    count = len(latencies) + failed
+    return {
+        "path": path,
+        "concurrency": concurrency,
+        "candidates": count,
+        "failed": failed,
+        "wall_s": round(wall, 3),
+        "candidates_per_s": round(len(latencies) / wall, 3) if wall else None,
+        "p50_s": round(float(p50), 3),
+        "p95_s": round(float(p95), 3),
+        "calls_per_candidate": round(calls / count, 2) if count else None,
+    }
+
+
+def bench_orchestrator(args, fake, roles, fixture_dir, base_url):
+    """Download, parse and screen each candidate with WorkflowOrchestrator.process_new_candidate"""
+    from agents import WorkflowOrchestrator
+    from utils import extract_resume
+
+    results = []
+    for run, level in enumerate(args.concurrency):
+        # Fresh files per level, so the resume cache does not skip parsing after the first level
+        records = write_resumes(fixture_dir, args.candidates, args.seed, prefix=f"orchestrator-{run}-c{level}")
+        ids = seed_candidates(records)
+        orchestrator = WorkflowOrchestrator(fake, FakeAsyncAnthropic(fake))
+
+        def screen(i):
+            start = time.perf_counter()
+            candidate = dict(records[i], id=ids[i])
+            candidate["resume"] = extract_resume(f"{base_url}/{records[i]['file_name']}")
+            orchestrator.process_new_candidate(candidate, roles[i % len(roles)])
+            return time.perf_counter() - start
+
+        fake.reset()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=level) as pool:
+            latencies = list(pool.map(screen, range(len(records))))
+        wall = time.perf_counter() - start
+        results.append(summarize("orchestrator", level, latencies, wall, fake.total_calls()))
+        print_row(results[-1])
+    return results
+
+
+def webhook_payload(record, roles, file_url):
+    titles = [role["title"] for role in roles]
+    role_answer = (
+        {"type": "choices", "choices": {"labels": titles}} if len(titles) > 1
+        else {"type": "choice", "choice": {"label": titles[0]}}
+    )
+    return {"form_response": {"answers": [
+        role_answer,
+        {"type": "text", "text": record["first_name"]},
+        {"type": "text", "text": record["last_name"]},
+        {"type": "email", "email": record["email"]},
+        {"type": "file_url", "file_url": file_url},
+    ]}}
+
+
+def bench_webhook(args, fake, roles, fixture_dir, base_url):
+    """POST Typeform payloads to /webhook and time each job from enqueue to done"""
+    import evaluation
+    import llm_client
+    from job_queue import JOB_DONE, JOB_FAILED, WorkerPool
+
+    # The webhook workers build their orchestrator on the process-wide clients
+    llm_client._client = fake
+    llm_client._async_client = FakeAsyncAnthropic(fake)
+    llm_client._orchestrator = None
+    client = evaluation.app.test_client()
+    # The app's own workers would compete with the sized pool of each level
+    evaluation.worker_pool.stop()
+
+    results = []
+    for run, level in enumerate(args.concurrency):
+        records = write_resumes(fixture_dir, args.candidates, args.seed, prefix=f"webhook-{run}-c{level}")
+        seed_candidates(records)
+        evaluation.worker_pool = WorkerPool(evaluation.job_queue, evaluation.process_webhook_data, size=level)
+        evaluation.worker_pool.start()
+
+        fake.reset()
+        start = time.perf_counter()
+        job_ids = []
+        for i, record in enumerate(records):
+            role_set = [roles[(i + k) % len(roles)] for k in range(args.roles_per_candidate)]
+            response = client.post("/webhook", json=webhook_payload(record, role_set, f"{base_url}/{record['file_name']}"))
+            if response.status_code != 200:
+                raise RuntimeError(f"/webhook answered {response.status_code}: {response.get_data(as_text=True)}")
+            job_ids.append(response.get_json()["job_id"])
+
+        placeholders = ",".join("?" * len(job_ids))
+        conn = sqlite3.connect(evaluation.job_queue.path)
+        while True:
+            rows = conn.execute(
+                f"SELECT status, created_at, updated_at FROM jobs WHERE id IN ({placeholders})", job_ids
+            ).fetchall()
+            if all(status in (JOB_DONE, JOB_FAILED) for status, _, _ in rows):
+                break
+            time.sleep(WEBHOOK_POLL_INTERVAL)
+        wall = time.perf_counter() - start
+        conn.close()
+        evaluation.worker_pool.stop()
+
+        latencies = [
+            (datetime.datetime.fromisoformat(updated) - datetime.datetime.fromisoformat(created)).total_seconds()
+            for status, created, updated in rows if status == JOB_DONE
+        ]
+        failed = sum(1 for status, _, _ in rows if status == JOB_FAILED)
+        results.append(summarize("webhook", level, latencies, wall, fake.total_calls(), failed))
+        print_row(results[-1])
+    return results
+
+
+HEADER = f"{'path':<13} {'conc':>5} {'cands':>6} {'failed':>6} {'wall s':>8} {'cand/s':>8} {'p50 s':>7} {'p95 s':>7} {'calls/cand':>10}"
+
+def print_row(row):
+    print(
+        f"{row['path']:<13} {row['concurrency']:>5} {row['candidates']:>6} {row['failed']:>6} {row['wall_s']:>8.2f} "
+        f"{row['candidates_per_s']:>8.2f} {row['p50_s']:>7.2f} {row['p95_s']:>7.2f} {row['calls_per_candidate']:>10.2f}",
+        file=sys.__stdout__, flush=True
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the screening pipeline against a fake Anthropic API")
+    parser.add_argument("--paths", default=",".join(PATHS), help=f"comma-separated subset of {', '.join(PATHS)}")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--candidates", type=int, default=32, help="candidates per concurrency level")
+    parser.add_argument("--latency", type=float, default=0.5, help="mean fake API latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency spread in seconds (±)")
+    parser.add_argument("--review-rounds", type=int, default=1, help="reviews asking for improvements before approval")
+    parser.add_argument("--score-jitter", type=int, default=5, help="overall_match spread between evaluations")
+    parser.add_argument("--roles-per-candidate", type=int, default=1, choices=range(1, len(ROLES) + 1),
+                        help="roles selected in each webhook submission")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep-limits", action="store_true", help="keep the configured LLM rate limits")
+    parser.add_argument("--workdir", help="directory for the temporary databases and fixtures (kept afterwards)")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="show the pipeline's own log output")
+    args = parser.parse_args()
+    args.paths = [path.strip() for path in args.paths.split(",") if path.strip()]
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+    unknown = set(args.paths) - set(PATHS)
+    if unknown:
+        parser.error(f"unknown paths: {', '.join(sorted(unknown))}")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="talentnexus-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    configure_environment(workdir, max(args.concurrency) * args.roles_per_candidate, args.keep_limits)
+    fake = FakeAnthropic(args.latency, args.jitter, args.review_rounds, args.score_jitter)
+    fixture_dir = os.path.join(workdir, "resumes")
+    os.makedirs(fixture_dir, exist_ok=True)
+    server, base_url = serve_directory(fixture_dir)
+
+    print(f"Working directory: {workdir}")
+    print(HEADER)
+    results = []
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.ExitStack() as stack:
+            if not args.verbose:
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+            roles = setup_database()
+            if "orchestrator" in args.paths:
+                results += bench_orchestrator(args, fake, roles, fixture_dir, base_url)
+            if "webhook" in args.paths:
+                results += bench_webhook(args, fake, roles, fixture_dir, base_url)
+    finally:
+        server.shutdown()
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": {k: v for k, v in vars(args).items() if k != "json"}, "results": results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
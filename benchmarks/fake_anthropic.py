@@ -0,0 +1,145 @@
+import asyncio
+import json
+import re
+import threading
+import time
+import zlib
+from types import SimpleNamespace
+
+EVALUATION = {
+    "technical_skills": 7,
+    "experience_level": 6,
+    "domain_knowledge": 6,
+    "culture_fit": 7,
+    "overall_match": 70,
+    "analysis_notes": "Solid technical background with relevant domain exposure.",
+    "experience_calculation": "Engineer 2018-2024: 6 years. Total: 6 years.",
+    "evidence": {"technical_skills": "Python, SQL and cloud deployment projects"},
+}
+APPROVED_REVIEW = {"status": "approved", "comments": "Scores are consistent with the resume."}
+IMPROVEMENT_REVIEW = {
+    "status": "needs_improvement",
+    "feedback": "Experience calculation misses the overlap between the last two positions.",
+    "improvement_areas": ["experience_level"],
+}
+ITERATION_PATTERN = re.compile(r"Iteration #(\d+)")
+
+
+class FakeAnthropic:
+    """Deterministic stand-in for anthropic.Anthropic with the messages and batches calls the agents use.
+
+    Every response depends only on the request: the latency is latency ± jitter
+    seconds, the evaluator's overall_match moves by up to score_jitter points
+    around the canned evaluation, and the reviewer asks for review_rounds
+    improvements before approving.
+    """
+
+    def __init__(self, latency=0.5, jitter=0.2, review_rounds=1, score_jitter=5,
+                 evaluation=None, approved_review=None, improvement_review=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.review_rounds = review_rounds
+        self.score_jitter = score_jitter
+        self.evaluation = evaluation or EVALUATION
+        self.approved_review = approved_review or APPROVED_REVIEW
+        self.improvement_review = improvement_review or IMPROVEMENT_REVIEW
+        self.calls = {"evaluator": 0, "reviewer": 0}
+        self._lock = threading.Lock()
+        self.messages = SimpleNamespace(create=self.create, batches=FakeBatches(self))
+
+    def reset(self):
+        with self._lock:
+            self.calls = dict.fromkeys(self.calls, 0)
+
+    def total_calls(self):
+        with self._lock:
+            return sum(self.calls.values())
+
+    def _respond(self, request):
+        """(delay, message) for a messages.create request"""
+        payload = json.dumps(request, sort_keys=True)
+        seed = zlib.crc32(payload.encode())
+        delay = max(0.0, self.latency + self.jitter * ((seed % 2001) / 1000 - 1))
+        if request.get("tools"):
+            agent = "evaluator"
+            evaluation = dict(self.evaluation)
+            if self.score_jitter:
+                shift = seed % (2 * self.score_jitter + 1) - self.score_jitter
+                evaluation["overall_match"] = min(100, max(0, evaluation["overall_match"] + shift))
+            block = SimpleNamespace(type="tool_use", name=request["tools"][0]["name"], input=evaluation)
+            output = json.dumps(evaluation)
+        else:
+            agent = "reviewer"
+            iteration = ITERATION_PATTERN.search(payload)
+            iteration = int(iteration.group(1)) if iteration else 1
+            review = self.improvement_review if iteration <= self.review_rounds else self.approved_review
+            output = json.dumps(review)
+            block = SimpleNamespace(type="text", text=output)
+        with self._lock:
+            self.calls[agent] += 1
+        usage = SimpleNamespace(
+            input_tokens=len(payload) // 4,
+            output_tokens=len(output) // 4,
+            cache_read_input_tokens=0,
+            cache_creation_input_tokens=0,
+        )
+        return delay, SimpleNamespace(id=f"msg_{seed:08x}", type="message", content=[block], usage=usage)
+
+    def create(self, **request):
+        delay, message = self._respond(request)
+        time.sleep(delay)
+        return message
+
+
+class FakeAsyncAnthropic:
+    """Async twin of FakeAnthropic sharing its responses and call counters"""
+
+    def __init__(self, client):
+        self.client = client
+        self.messages = SimpleNamespace(create=self.create)
+
+    async def create(self, **request):
+        delay, message = self.client._respond(request)
+        await asyncio.sleep(delay)
+        return message
+
+
+class FakeBatches:
+    """Message Batches that end as soon as they are created.
+
+    failures maps a custom_id to the result type ("errored", "expired" or
+    "canceled") its requests end with; every other request succeeds.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.results_by_batch = {}
+        self.failures = {}
+        self._lock = threading.Lock()
+
+    def create(self, requests):
+        entries = []
+        for request in requests:
+            failure = self.failures.get(request["custom_id"])
+            if failure:
+                result = SimpleNamespace(type=failure)
+            else:
+                _, message = self.client._respond(request["params"])
+                result = SimpleNamespace(type="succeeded", message=message)
+            entries.append(SimpleNamespace(custom_id=request["custom_id"], result=result))
+        with self._lock:
+            batch_id = f"msgbatch_{len(self.results_by_batch) + 1:04d}"
+            self.results_by_batch[batch_id] = entries
+        return SimpleNamespace(id=batch_id)
+
+    def retrieve(self, batch_id):
+        with self._lock:
+            entries = self.results_by_batch[batch_id]
+        counts = {}
+        for entry in entries:
+            counts[entry.result.type] = counts.get(entry.result.type, 0) + 1
+        return SimpleNamespace(id=batch_id, processing_status="ended", request_counts=counts)
+
+    def results(self, batch_id):
+        with self._lock:
+            return iter(list(self.results_by_batch[batch_id]))
@@ -0,0 +1,127 @@
+import functools
+import os
+import random
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from docx import Document
+
+FIRST_NAMES = ["Ada", "Grace", "Alan", "Edsger", "Barbara", "Donald", "Frances", "Ken", "Margaret", "Linus"]
+LAST_NAMES = ["Lovelace", "Hopper", "Turing", "Dijkstra", "Liskov", "Knuth", "Allen", "Thompson", "Hamilton", "Torvalds"]
+SKILLS = [
+    "Python", "SQL", "Kubernetes", "Docker", "AWS", "Terraform", "PyTorch", "scikit-learn", "Airflow",
+    "Spark", "FastAPI", "Flask", "PostgreSQL", "Kafka", "CI/CD", "MLOps", "data pipelines", "monitoring",
+]
+EMPLOYERS = ["Acme Analytics", "Globex", "Initech", "Umbrella Labs", "Hooli", "Stark Industries", "Wayne Data"]
+TITLES = ["Software Engineer", "Data Engineer", "ML Engineer", "Platform Engineer", "Operations Analyst"]
+LINES_PER_PAGE = 45
+
+ROLES = [
+    {
+        "title": "AI Operations Manager",
+        "description": "Run production ML systems: Python, Kubernetes, MLOps, monitoring, data pipelines and on-call ownership.",
+    },
+    {
+        "title": "Data Engineer",
+        "description": "Build batch and streaming data pipelines with Python, SQL, Spark, Kafka, Airflow and PostgreSQL.",
+    },
+]
+
+
+def synthetic_resume(index, seed=0, positions=4):
+    """Deterministic plain-text resume for candidate number index"""
+    rng = random.Random(f"{seed}:{index}")
+    first_name = FIRST_NAMES[index % len(FIRST_NAMES)]
+    last_name = LAST_NAMES[(index // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    lines = [
+        f"{first_name} {last_name}",
+        f"{first_name.lower()}.{last_name.lower()}{index}@example.com",
+        "",
+        "Summary",
+        f"Engineer with {rng.randint(2, 15)} years of experience in {', '.join(rng.sample(SKILLS, 4))}.",
+        "",
+        "Experience",
+    ]
+    year = 2025
+    for _ in range(positions):
+        start = year - rng.randint(1, 4)
+        lines.append(f"{rng.choice(TITLES)}, {rng.choice(EMPLOYERS)} ({start}-{year})")
+        for _ in range(3):
+            lines.append(f"- Delivered {rng.choice(SKILLS)} and {rng.choice(SKILLS)} work for {rng.randint(2, 40)} teams")
+        year = start
+    lines += ["", "Skills", ", ".join(rng.sample(SKILLS, 8))]
+    return {"first_name": first_name, "last_name": last_name, "email": lines[1], "resume": "\n".join(lines)}
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path, text):
+    """Write text as a minimal PDF (Helvetica, one Tj operator per line) that PdfReader can extract"""
+    lines = text.splitlines() or [""]
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+    font_id = 3 + 2 * len(pages)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(len(pages)))}] /Count {len(pages)} >>",
+    ]
+    for i, page in enumerate(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>"
+        )
+        stream = "BT /F1 10 Tf 14 TL 56 740 Td " + " ".join(f"({_pdf_escape(line)}) Tj T*" for line in page) + " ET"
+        objects.append(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def write_docx(path, text):
+    document = Document()
+    for line in text.splitlines():
+        document.add_paragraph(line)
+    document.save(path)
+
+
+def write_resumes(directory, count, seed=0, prefix="candidate", docx_every=3):
+    """Write count synthetic resumes into directory, every docx_every-th one as DOCX and the rest as PDF.
+
+    Returns one record per resume with the name, email, resume text and file name.
+    """
+    os.makedirs(directory, exist_ok=True)
+    records = []
+    for index in range(count):
+        record = synthetic_resume(index, seed)
+        # The prefix goes into the text too, so each fixture set has its own content hashes
+        record["resume"] += f"\n\nReference: {prefix}-{index}"
+        record["email"] = f"{prefix}-{index}-{record['email']}"
+        extension = "docx" if docx_every and index % docx_every == docx_every - 1 else "pdf"
+        record["file_name"] = f"{prefix}-{index:05d}.{extension}"
+        path = os.path.join(directory, record["file_name"])
+        (write_docx if extension == "docx" else write_pdf)(path, record["resume"])
+        records.append(record)
+    return records
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_directory(directory):
+    """Serve directory over HTTP on a free localhost port from a daemon thread; returns (server, base_url)"""
+    handler = functools.partial(_QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, name="fixture-server", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
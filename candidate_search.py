@@ -0,0 +1,208 @@
+import argparse
+import os
+import threading
+import numpy as np
+from dotenv import load_dotenv
+from db.db_helper import get_connection
+from text_index import TEXT_VECTOR_DIM, tokenize, vectorize
+
+load_dotenv()
+SEARCH_DEFAULT_K = int(os.getenv('SEARCH_DEFAULT_K', '20'))
+SEARCH_INDEX_BATCH_SIZE = int(os.getenv('SEARCH_INDEX_BATCH_SIZE', '1000'))
+SEARCH_METHODS = ("fts", "vector")
+
+RESULT_COLUMNS = "c.id, c.first_name, c.last_name, c.email, c.submission_date, c.status"
+
+
+def fts_query(text):
+    """FTS5 MATCH expression that ORs the quoted query terms"""
+    terms = dict.fromkeys(tokenize(text))
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+def search_fts(conn, query, k=SEARCH_DEFAULT_K):
+    """BM25-ranked full-text matches from candidates_fts"""
+    match = fts_query(query)
+    if not match:
+        return []
+    cursor = conn.execute(
+        f"""
+        SELECT {RESULT_COLUMNS}, -bm25(candidates_fts) AS score,
+               snippet(candidates_fts, 2, '**', '**', '…', 16) AS snippet
+        FROM candidates_fts
+        JOIN candidates c ON c.id = candidates_fts.rowid
+        WHERE candidates_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?
+        """,
+        (match, k)
+    )
+    column_names = [description[0] for description in cursor.description]
+    return [dict(zip(column_names, row)) for row in cursor.fetchall()]
+
+
+def index_missing_vectors(conn, batch_size=SEARCH_INDEX_BATCH_SIZE):
+    """Vectorize every candidate without a row in candidate_vectors; returns how many were added.
+
+    New candidates are vectorized when they are inserted, so this only
+    backfills databases created before that (python candidate_search.py --index-missing).
+    """
+    added = 0
+    # Cheap check first: every vector belongs to a live candidate, so equal counts mean nothing is missing
+    missing = conn.execute(
+        "SELECT (SELECT COUNT(*) FROM candidates) - (SELECT COUNT(*) FROM candidate_vectors)"
+    ).fetchone()[0]
+    while missing > 0:
+        rows = conn.execute(
+            """
+            SELECT c.id, c.resume FROM candidates c
+            LEFT JOIN candidate_vectors v ON v.candidate_id = c.id
+            WHERE v.candidate_id IS NULL
+            LIMIT ?
+            """,
+            (batch_size,)
+        ).fetchall()
+        if not rows:
+            break
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO candidate_vectors (candidate_id, vector) VALUES (?, ?)",
+                [(candidate_id, vectorize(resume).astype(np.float16).tobytes()) for candidate_id, resume in rows]
+            )
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        added += len(rows)
+        missing -= len(rows)
+    return added
+
+
+class CandidateVectorIndex:
+    """In-memory matrix of candidate vectors, refreshed incrementally from candidate_vectors.
+
+    Vectors are stored as float16 in SQLite and widened to float32 once on load,
+    so a query is a single BLAS matrix-vector product.
+    """
+
+    def __init__(self, dim=TEXT_VECTOR_DIM):
+        self.dim = dim
+        self.ids = np.empty(0, dtype=np.int64)
+        self.matrix = np.empty((0, dim), dtype=np.float32)
+        self.last_seq = 0
+        self._lock = threading.Lock()
+
+    def refresh(self, conn):
+        """Load vectors written since the last refresh; reads only"""
+        with self._lock:
+            count = conn.execute("SELECT COUNT(*) FROM candidate_vectors").fetchone()[0]
+            self._load(conn)
+            if len(self.ids) != count:
+                # Rows were deleted since the last refresh; reload from scratch
+                self.ids = np.empty(0, dtype=np.int64)
+                self.matrix = np.empty((0, self.dim), dtype=np.float32)
+                self.last_seq = 0
+                self._load(conn)
+
+    def _load(self, conn):
+        rows = conn.execute(
+            "SELECT seq, candidate_id, vector FROM candidate_vectors WHERE seq > ? ORDER BY seq",
+            (self.last_seq,)
+        ).fetchall()
+        if not rows:
+            return
+        ids = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+        matrix = np.frombuffer(b"".join(row[2] for row in rows), dtype=np.float16).reshape(len(rows), self.dim)
+        matrix = matrix.astype(np.float32)
+        # A re-vectorized candidate (resume changed) replaces its old row
+        keep = ~np.isin(self.ids, ids)
+        self.ids = np.concatenate([self.ids[keep], ids])
+        self.matrix = np.concatenate([self.matrix[keep], matrix])
+        self.last_seq = rows[-1][0]
+
+    def top_k(self, vector, k):
+        """(candidate_ids, scores) of the k rows with the highest cosine similarity, best first"""
+        with self._lock:
+            ids, matrix = self.ids, self.matrix
+        if not len(ids) or k <= 0:
+            return ids[:0], np.empty(0, dtype=np.float32)
+        scores = matrix @ vector
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return ids[top], scores[top]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_vector_index(conn):
+    """Return the CandidateVectorIndex for the database conn is attached to"""
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = CandidateVectorIndex()
+        return _indexes[path]
+
+
+def search_vectors(conn, query, k=SEARCH_DEFAULT_K):
+    """Candidates ranked by cosine similarity between their resume vector and the query's"""
+    query_vector = vectorize(query)
+    if not query_vector.any():
+        return []
+    index = get_vector_index(conn)
+    index.refresh(conn)
+    ids, scores = index.top_k(query_vector, k)
+    if not len(ids):
+        return []
+
+    placeholders = ",".join("?" * len(ids))
+    cursor = conn.execute(f"SELECT {RESULT_COLUMNS} FROM candidates c WHERE c.id IN ({placeholders})", ids.tolist())
+    column_names = [description[0] for description in cursor.description]
+    rows = {row[0]: dict(zip(column_names, row)) for row in cursor.fetchall()}
+    results = []
+    for candidate_id, score in zip(ids.tolist(), scores.tolist()):
+        # A score of 0 or less means the resume shares no terms with the query
+        if candidate_id in rows and score > 0:
+            results.append(dict(rows[candidate_id], score=score, snippet=None))
+    return results
+
+
+def search_candidates(query, k=SEARCH_DEFAULT_K, method="fts", conn=None):
+    """Top-k stored candidates for a free-text query (e.g. a role description).
+
+    method "fts" ranks keyword matches with BM25 from the candidates_fts index;
+    "vector" ranks every resume by cosine similarity of hashed term vectors.
+    """
+    if method not in SEARCH_METHODS:
+        raise ValueError(f"Unknown search method: {method}")
+    if conn is None:
+        conn = get_connection()
+    if method == "fts":
+        return search_fts(conn, query, k)
+    return search_vectors(conn, query, k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search stored candidates by resume content")
+    parser.add_argument("query", nargs="?", help="Keywords or a full role description")
+    parser.add_argument("-k", type=int, default=SEARCH_DEFAULT_K)
+    parser.add_argument("--method", choices=SEARCH_METHODS, default="fts")
+    parser.add_argument("--index-missing", action="store_true",
+                        help="first vectorize candidates stored before vectors were written on insert")
+    args = parser.parse_args()
+    if args.query is None and not args.index_missing:
+        parser.error("a query or --index-missing is required")
+
+    if args.index_missing:
+        print(f"Vectorized {index_missing_vectors(get_connection())} resumes")
+    if args.query is None:
+        return
+
+    for result in search_candidates(args.query, args.k, args.method):
+        print(f"{result['score']:8.3f}  {result['first_name']} {result['last_name']} <{result['email']}>")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,23 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 from datetime import datetime
+from dashboard_data import (
+    DASHBOARD_PAGE_SIZE,
+    count_candidates,
+    get_analysis_notes,
+    get_candidate_page,
+    get_change_marker,
+    get_role_stats,
+    get_score_buckets,
+    get_new_candidates,
+    get_resumes,
+    get_role,
+    get_roles,
+    search_candidates,
+)
 
 # Page configuration - MUST BE THE FIRST STREAMLIT COMMAND
 st.set_page_config(
@@ -301,18 +314,11 @@ st.markdown("""
 st.markdown('<div class="main-title">TALENTNEXUS</div>', unsafe_allow_html=True)
 st.markdown('<div class="subtitle">AI-powered Talent Screening System</div>', unsafe_allow_html=True)
 
-# Database connection
-@st.cache_resource
-def get_connection():
-    return sqlite3.connect('db/talentnexus.db', check_same_thread=False)
-
-conn = get_connection()
-
 # Sidebar for filtering
 st.sidebar.markdown(f'<h2 style="color:{BIOPTIMUS_PURPLE};">Filters</h2>', unsafe_allow_html=True)
 
 # Get list of roles
-roles_df = pd.read_sql("SELECT id, title FROM roles", conn)
+roles_df = get_roles()
 selected_role_id = st.sidebar.selectbox(
     "Select Role", 
     roles_df['id'].tolist(), 
@@ -323,49 +329,61 @@ selected_role_id = st.sidebar.selectbox(
 status_options = ["All", "Move to Interview", "Further Review", "Do Not Proceed"]
 selected_status = st.sidebar.selectbox("Candidate Status", status_options)
 
-# Build the query based on filters
-query = """
-SELECT 
-    c.id, c.first_name, c.last_name, c.email, c.submission_date, c.status,
-    e.technical_skills, e.experience_level, e.domain_knowledge, e.culture_fit, 
-    e.overall_match, e.analysis_notes, e.recommendation, e.id as evaluation_id
-FROM 
-    candidates c
-JOIN 
-    evaluations e ON c.id = e.candidate_id
-WHERE 
-    e.role_id = ?
-"""
+# Pagination - only one page of candidates is loaded at a time
+total_candidates = count_candidates(selected_role_id, selected_status)
+page_count = max(1, -(-total_candidates // DASHBOARD_PAGE_SIZE))
+page_number = st.sidebar.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
 
-params = [selected_role_id]
+# Auto-refresh settings
+st.sidebar.markdown(f'<h2 style="color:{BIOPTIMUS_PURPLE}; margin-top: 2rem;">Dashboard Settings</h2>', unsafe_allow_html=True)
 
-if selected_status != "All":
-    query += " AND c.status = ?"
-    params.append(selected_status)
+refresh_interval = st.sidebar.slider("Auto-refresh interval (seconds)", 0, 300, 0)
 
-query += " ORDER BY e.overall_match DESC"
+if refresh_interval > 0:
+    st.sidebar.write(f"Dashboard will check for new evaluations every {refresh_interval} seconds")
 
-# Execute query
-candidates_df = pd.read_sql(query, conn, params=params)
+# Remember the newest evaluation already on screen for this role and filter
+if st.session_state.get('refresh_filter') != (selected_role_id, selected_status):
+    st.session_state.refresh_filter = (selected_role_id, selected_status)
+    st.session_state.last_evaluation_id = get_change_marker()
+    st.session_state.new_candidates_df = None
 
-# Calculate candidate fullname
-candidates_df['full_name'] = candidates_df['first_name'] + ' ' + candidates_df['last_name']
+candidates_df = get_candidate_page(selected_role_id, selected_status, int(page_number) - 1)
 
 # Get role information
-role_info = pd.read_sql("SELECT * FROM roles WHERE id = ?", conn, params=[selected_role_id])
+role_info = get_role(selected_role_id)
 role_title = role_info['title'].iloc[0] if not role_info.empty else "Unknown Role"
 
 # Main dashboard area
 st.markdown(f"<h2 style='color:{BIOPTIMUS_PURPLE};'>Candidates for {role_title}</h2>", unsafe_allow_html=True)
-st.markdown(f"<p>Showing {len(candidates_df)} candidates</p>", unsafe_allow_html=True)
+first_shown = (int(page_number) - 1) * DASHBOARD_PAGE_SIZE
+st.markdown(f"<p>Showing {first_shown + 1 if len(candidates_df) else 0}-{first_shown + len(candidates_df)} of {total_candidates} candidates (page {int(page_number)} of {page_count})</p>", unsafe_allow_html=True)
+
+# Role-level KPIs, read from the precomputed role_stats table
+role_stats = get_role_stats(selected_role_id)
+if role_stats and role_stats['evaluation_count']:
+    evaluation_count = role_stats['evaluation_count']
+    kpis = [
+        ("Evaluations", f"{evaluation_count}"),
+        ("Avg. Overall Match", f"{role_stats['overall_match_sum'] / evaluation_count:.1f}%"),
+        ("Avg. Technical", f"{role_stats['technical_skills_sum'] / evaluation_count:.1f}/10"),
+        ("Move to Interview", f"{role_stats['interview_count']}"),
+        ("Further Review", f"{role_stats['review_count']}"),
+        ("Do Not Proceed", f"{role_stats['reject_count']}"),
+    ]
+    for column, (label, value) in zip(st.columns(len(kpis)), kpis):
+        column.markdown(f'<div class="metric-card"><div class="metric-value">{value}</div><div class="metric-label">{label}</div></div>', unsafe_allow_html=True)
 
-# Skip summary metrics and go straight to score distribution
 st.markdown(f"<h3 style='color:{BIOPTIMUS_PURPLE}; margin-top: 2rem;'>Score Distribution</h3>", unsafe_allow_html=True)
 
 # Custom plotly theme to match Bioptimus
-fig = px.histogram(candidates_df, x="overall_match", nbins=10, 
-                  title="Distribution of Overall Match Scores",
-                  labels={"overall_match": "Overall Match %", "count": "Number of Candidates"})
+score_buckets = pd.DataFrame({
+    "overall_match": [f"{i * 10}-{i * 10 + 10}" for i in range(10)],
+    "count": get_score_buckets(selected_role_id, selected_status),
+})
+fig = px.bar(score_buckets, x="overall_match", y="count",
+             title="Distribution of Overall Match Scores",
+             labels={"overall_match": "Overall Match %", "count": "Number of Candidates"})
 
 # Update the figure appearance to match Bioptimus color scheme
 fig.update_layout(
@@ -401,6 +419,145 @@ fig.update_traces(marker_color=BIOPTIMUS_PURPLE, marker_line_color=BIOPTIMUS_LIG
 
 st.plotly_chart(fig, use_container_width=True)
 
+def build_radar_chart(row):
+    """Radar chart of the four dimension scores for one candidate"""
+    categories = ['Technical Skills', 'Experience', 'Domain Knowledge', 'Culture Fit']
+    scores = [
+        row['technical_skills'], 
+        row['experience_level'], 
+        row['domain_knowledge'], 
+        row['culture_fit']
+    ]
+    
+    # Create a radar chart with Bioptimus colors
+    fig = go.Figure()
+    fig.add_trace(go.Scatterpolar(
+        r=scores + [scores[0]],
+        theta=categories + [categories[0]],
+        fill='toself',
+        name='Candidate Scores',
+        line_color=BIOPTIMUS_PURPLE,
+        fillcolor=f'rgba(99, 69, 255, 0.3)'
+    ))
+    
+    # Create the radar chart layout with 5% reduced size
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 10],
+                linecolor='#EEEEEE'
+            ),
+            bgcolor='white',
+        ),
+        paper_bgcolor='white',
+        plot_bgcolor='white',
+        showlegend=False,
+        margin=dict(l=45, r=45, t=25, b=45),  # Slightly larger margins to reduce chart size
+        font_color="#333333",
+        height=380,  # Set explicit height (5% smaller than default 400)
+        width=380    # Set explicit width (5% smaller than default 400)
+    )
+    return fig
+
+def render_candidate_details(row, notes, resume):
+    """Details panel for one candidate: contact info, analysis notes, resume and radar chart"""
+    detail_cols = st.columns(2)
+    
+    # Left column: Basic info and analysis notes
+    with detail_cols[0]:
+        # Display recommendation directly from the database
+        recommendation_class = {
+            'Move to Interview': 'status-interview',
+            'Further Review': 'status-review',
+            'Do Not Proceed': 'status-reject'
+        }.get(row['recommendation'], '')
+        
+        st.markdown(f"""
+        <div style="margin-bottom: 15px; color: #333333;">
+            <p><strong>Email:</strong> {row['email']}</p>
+            <p><strong>Applied:</strong> {row['submission_date']}</p>
+            <p><strong>Recommendation:</strong> <span class="{recommendation_class}">
+                {row['recommendation']}
+            </span></p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        st.markdown("<strong>Analysis Notes:</strong>", unsafe_allow_html=True)
+        st.write(notes)
+        
+        # Display Resume directly - not in an expander
+        st.markdown(f"### {row['full_name']}'s Resume")
+        
+        if resume:
+            st.markdown(resume)
+        else:
+            # Sample resume if real data not available
+            st.markdown(f"""
+            ## {row['full_name']}
+            **Email:** {row['email']}
+            
+            ### Summary
+            Experienced professional with expertise in {row['technical_skills'] > 7 and 'technical leadership' or 'project management'} 
+            and a focus on {row['domain_knowledge'] > 7 and 'domain-specific solutions' or 'cross-functional collaboration'}.
+            
+            ### Experience
+            **Senior Position** | Previous Company | 2021-Present
+            - Led teams of {int(row['experience_level'])} members
+            - Implemented solutions resulting in {int(row['overall_match'])}% efficiency improvements
+            
+            **Earlier Role** | Earlier Company | 2018-2021
+            - Collaborated across departments
+            - Developed expertise in relevant technologies
+            
+            ### Skills
+            - Technical: {'Advanced' if row['technical_skills'] > 7 else 'Intermediate'} programming skills
+            - Domain: {'Deep' if row['domain_knowledge'] > 7 else 'Working'} knowledge of industry standards
+            - Interpersonal: {'Excellent' if row['culture_fit'] > 7 else 'Strong'} communication and teamwork
+            
+            This is a placeholder resume generated based on candidate scores.
+            """)
+    
+    # Right column: Radar chart of scores
+    with detail_cols[1]:
+        st.plotly_chart(build_radar_chart(row), use_container_width=True, key=f"radar_{row['evaluation_id']}")
+
+def render_candidate_row(row):
+    """One line of the candidate list"""
+    # Create the candidate row - without color styling based on status
+    st.markdown(f"""
+    <div style="display: grid; grid-template-columns: 3fr 1fr 1fr 1fr 1fr 1fr; padding: 10px; border-bottom: 1px solid #eeeeee; align-items: center; color: #333333;">
+        <div>{row['full_name']}</div>
+        <div>{row['technical_skills']:.1f}/10</div>
+        <div>{row['experience_level']:.1f}/10</div>
+        <div>{row['domain_knowledge']:.1f}/10</div>
+        <div>{row['culture_fit']:.1f}/10</div>
+        <div><strong>{row['overall_match']:.1f}%</strong></div>
+    </div>
+    """, unsafe_allow_html=True)
+
+# Polls the cheap change marker and only queries rows that arrived since the
+# last check; when nothing changed the fragment rerun does no database work
+@st.fragment(run_every=refresh_interval if refresh_interval > 0 else None)
+def show_new_evaluations():
+    marker = get_change_marker()
+    if marker > st.session_state.last_evaluation_id:
+        new_df = get_new_candidates(selected_role_id, selected_status, st.session_state.last_evaluation_id)
+        if st.session_state.new_candidates_df is not None:
+            new_df = pd.concat([new_df, st.session_state.new_candidates_df], ignore_index=True)
+        st.session_state.new_candidates_df = new_df
+        st.session_state.last_evaluation_id = marker
+    
+    if refresh_interval > 0:
+        st.caption("Last checked: " + datetime.now().strftime("%H:%M:%S"))
+    new_df = st.session_state.new_candidates_df
+    if new_df is not None and not new_df.empty:
+        st.markdown(f"<h3 style='color:{BIOPTIMUS_PURPLE};'>New Since Last Refresh ({len(new_df)})</h3>", unsafe_allow_html=True)
+        for index, row in new_df.iterrows():
+            render_candidate_row(row)
+
+show_new_evaluations()
+
 # Candidate table with expandable rows
 st.markdown(f"<h3 style='color:{BIOPTIMUS_PURPLE};'>Candidate Evaluations</h3>", unsafe_allow_html=True)
 
@@ -416,146 +573,50 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# Details (analysis notes, resume, radar chart) are only loaded and built for
+# rows whose toggle is switched on, with one batched query per kind of data
+expanded = candidates_df[candidates_df['evaluation_id'].map(
+    lambda evaluation_id: bool(st.session_state.get(f"details_{evaluation_id}"))
+).astype(bool)]
+analysis_notes = get_analysis_notes(tuple(int(i) for i in expanded['evaluation_id']))
+resumes = get_resumes(tuple(int(i) for i in expanded['id']))
+
 # Display each candidate with expandable details
 for index, row in candidates_df.iterrows():
-    # Create the candidate row - without color styling based on status
-    st.markdown(f"""
-    <div style="display: grid; grid-template-columns: 3fr 1fr 1fr 1fr 1fr 1fr; padding: 10px; border-bottom: 1px solid #eeeeee; align-items: center; color: #333333;">
-        <div>{row['full_name']}</div>
-        <div>{row['technical_skills']:.1f}/10</div>
-        <div>{row['experience_level']:.1f}/10</div>
-        <div>{row['domain_knowledge']:.1f}/10</div>
-        <div>{row['culture_fit']:.1f}/10</div>
-        <div><strong>{row['overall_match']:.1f}%</strong></div>
-    </div>
-    """, unsafe_allow_html=True)
+    render_candidate_row(row)
     
     # Expandable section for details
-    with st.expander(f"View details for {row['full_name']}"):
-        detail_cols = st.columns(2)
-        
-        # Left column: Basic info and analysis notes
-        with detail_cols[0]:
-            # Display recommendation directly from the database
-            recommendation_class = {
-                'Move to Interview': 'status-interview',
-                'Further Review': 'status-review',
-                'Do Not Proceed': 'status-reject'
-            }.get(row['recommendation'], '')
-            
-            st.markdown(f"""
-            <div style="margin-bottom: 15px; color: #333333;">
-                <p><strong>Email:</strong> {row['email']}</p>
-                <p><strong>Applied:</strong> {row['submission_date']}</p>
-                <p><strong>Recommendation:</strong> <span class="{recommendation_class}">
-                    {row['recommendation']}
-                </span></p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            st.markdown("<strong>Analysis Notes:</strong>", unsafe_allow_html=True)
-            st.write(row['analysis_notes'])
-            
-            # Display Resume directly - not in an expander
-            st.markdown(f"### {row['full_name']}'s Resume")
-            
-            # Fetch resume from candidates table
-            resume_query = "SELECT resume FROM candidates WHERE id = ?"
-            resume_data = pd.read_sql(resume_query, conn, params=[row['id']])
-            
-            if not resume_data.empty and resume_data['resume'].iloc[0]:
-                st.markdown(resume_data['resume'].iloc[0])
-            else:
-                # Sample resume if real data not available
-                st.markdown(f"""
-                ## {row['full_name']}
-                **Email:** {row['email']}
-                
-                ### Summary
-                Experienced professional with expertise in {row['technical_skills'] > 7 and 'technical leadership' or 'project management'} 
-                and a focus on {row['domain_knowledge'] > 7 and 'domain-specific solutions' or 'cross-functional collaboration'}.
-                
-                ### Experience
-                **Senior Position** | Previous Company | 2021-Present
-                - Led teams of {int(row['experience_level'])} members
-                - Implemented solutions resulting in {int(row['overall_match'])}% efficiency improvements
-                
-                **Earlier Role** | Earlier Company | 2018-2021
-                - Collaborated across departments
-                - Developed expertise in relevant technologies
-                
-                ### Skills
-                - Technical: {'Advanced' if row['technical_skills'] > 7 else 'Intermediate'} programming skills
-                - Domain: {'Deep' if row['domain_knowledge'] > 7 else 'Working'} knowledge of industry standards
-                - Interpersonal: {'Excellent' if row['culture_fit'] > 7 else 'Strong'} communication and teamwork
-                
-                This is a placeholder resume generated based on candidate scores.
-                """)
-        
-        # Right column: Radar chart of scores
-        with detail_cols[1]:
-            categories = ['Technical Skills', 'Experience', 'Domain Knowledge', 'Culture Fit']
-            scores = [
-                row['technical_skills'], 
-                row['experience_level'], 
-                row['domain_knowledge'], 
-                row['culture_fit']
-            ]
-            
-            # Create a radar chart with Bioptimus colors
-            fig = go.Figure()
-            fig.add_trace(go.Scatterpolar(
-                r=scores + [scores[0]],
-                theta=categories + [categories[0]],
-                fill='toself',
-                name='Candidate Scores',
-                line_color=BIOPTIMUS_PURPLE,
-                fillcolor=f'rgba(99, 69, 255, 0.3)'
-            ))
-            
-            # Create the radar chart layout with 5% reduced size
-            fig.update_layout(
-                polar=dict(
-                    radialaxis=dict(
-                        visible=True,
-                        range=[0, 10],
-                        linecolor='#EEEEEE'
-                    ),
-                    bgcolor='white',
-                ),
-                paper_bgcolor='white',
-                plot_bgcolor='white',
-                showlegend=False,
-                margin=dict(l=45, r=45, t=25, b=45),  # Slightly larger margins to reduce chart size
-                font_color="#333333",
-                height=380,  # Set explicit height (5% smaller than default 400)
-                width=380    # Set explicit width (5% smaller than default 400)
+    if st.toggle(f"View details for {row['full_name']}", key=f"details_{row['evaluation_id']}"):
+        with st.container(border=True):
+            render_candidate_details(
+                row,
+                analysis_notes.get(row['evaluation_id'], ''),
+                resumes.get(row['id'])
             )
-            st.plotly_chart(fig, use_container_width=True)
 
-# Add auto-refresh capability
-st.sidebar.markdown(f'<h2 style="color:{BIOPTIMUS_PURPLE}; margin-top: 2rem;">Dashboard Settings</h2>', unsafe_allow_html=True)
+# Search across every stored resume, not just the selected role
+st.markdown(f"<h3 style='color:{BIOPTIMUS_PURPLE}; margin-top: 2rem;'>Candidate Search</h3>", unsafe_allow_html=True)
+search_col, method_col, k_col = st.columns([4, 1, 1])
+with search_col:
+    search_query = st.text_input("Search all resumes", placeholder="Keywords or a role description")
+with method_col:
+    search_ranking = st.selectbox("Ranking", ["Keyword (BM25)", "Similarity"])
+with k_col:
+    search_k = st.number_input("Results", min_value=1, max_value=200, value=20, step=5)
 
-refresh_interval = st.sidebar.slider("Auto-refresh interval (seconds)", 0, 300, 0)
-
-if refresh_interval > 0:
-    st.sidebar.write(f"Dashboard will auto-refresh every {refresh_interval} seconds")
-    st.sidebar.write("Last refreshed: " + datetime.now().strftime("%H:%M:%S"))
-    
-    # Add JavaScript for auto-refresh
-    refresh_js = f"""
-    <script>
-        var refreshRate = {refresh_interval * 1000};
-        function refresh() {{
-            setTimeout(function() {{
-                window.location.reload();
-                refresh();
-            }}, refreshRate);
-        }}
-        refresh();
-    </script>
-    """
-    st.sidebar.markdown(refresh_js, unsafe_allow_html=True)
+if search_query.strip():
+    search_method = "fts" if search_ranking == "Keyword (BM25)" else "vector"
+    search_df = search_candidates(search_query, int(search_k), search_method)
+    if search_df.empty:
+        st.info("No matching candidates")
+    else:
+        search_df['full_name'] = search_df['first_name'] + ' ' + search_df['last_name']
+        st.dataframe(
+            search_df[['full_name', 'email', 'status', 'submission_date', 'score', 'snippet']],
+            hide_index=True,
+            use_container_width=True,
+            column_config={"score": st.column_config.NumberColumn("Score", format="%.3f")}
+        )
 
 # Footer with Bioptimus branding
 st.markdown("---")
@@ -0,0 +1,154 @@
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+import streamlit as st
+import candidate_search
+from db.migrations import apply_migrations
+
+DASHBOARD_DB_PATH = os.getenv('DASHBOARD_DB_PATH', 'db/talentnexus.db')
+DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', '30'))
+DASHBOARD_PAGE_SIZE = int(os.getenv('DASHBOARD_PAGE_SIZE', '50'))
+
+# Columns needed to render a row of the candidate list; large text is loaded separately
+LIST_COLUMNS = """
+    c.id, c.first_name, c.last_name, c.email, c.submission_date, c.status,
+    e.technical_skills, e.experience_level, e.domain_knowledge, e.culture_fit,
+    e.overall_match, e.recommendation, e.id as evaluation_id
+"""
+
+
+@st.cache_resource
+def get_connection():
+    conn = sqlite3.connect(DASHBOARD_DB_PATH, check_same_thread=False)
+    apply_migrations(conn)
+    return conn
+
+
+def _role_filter(role_id, status):
+    """WHERE clause and params shared by the list, count and score queries"""
+    where = "e.role_id = ?"
+    params = [role_id]
+    if status != "All":
+        where += " AND c.status = ?"
+        params.append(status)
+    return where, params
+
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL)
+def get_roles():
+    return pd.read_sql("SELECT id, title FROM roles", get_connection())
+
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL)
+def get_role(role_id):
+    return pd.read_sql("SELECT * FROM roles WHERE id = ?", get_connection(), params=[role_id])
+
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL)
+def count_candidates(role_id, status):
+    where, params = _role_filter(role_id, status)
+    query = f"SELECT COUNT(*) FROM candidates c JOIN evaluations e ON c.id = e.candidate_id WHERE {where}"
+    return get_connection().execute(query, params).fetchone()[0]
+
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL)
+def get_match_scores(role_id, status):
+    """Only the overall_match column, for the score distribution"""
+    where, params = _role_filter(role_id, status)
+    query = f"SELECT e.overall_match FROM candidates c JOIN evaluations e ON c.id = e.candidate_id WHERE {where}"
+    return pd.read_sql(query, get_connection(), params=params)
+
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL)
+def get_role_stats(role_id):
+    """Precomputed aggregates for a role from role_stats, or None if it has no evaluations"""
+    conn = get_connection()
+    cursor = conn.execute("SELECT * FROM role_stats WHERE role_id = ?", (role_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return dict(zip([description[0] for description in cursor.description], row))
+
+
+def get_score_buckets(role_id, status):
+    """Candidate counts per 10-point overall_match bucket.
+
+    The unfiltered view reads role_stats directly; a status filter needs the
+    candidates table, so it falls back to bucketing the filtered scores.
+    """
+    if status == "All":
+        stats = get_role_stats(role_id)
+        return [stats[f"bucket_{i}"] if stats else 0 for i in range(10)]
+    scores = get_match_scores(role_id, status)['overall_match'].fillna(0).to_numpy()
+    return np.bincount(np.clip(scores // 10, 0, 9).astype(int), minlength=10).tolist()
+
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL)
+def get_candidate_page(role_id, status, page, page_size=DASHBOARD_PAGE_SIZE):
+    """One page of list-view rows, best match first"""
+    where, params = _role_filter(role_id, status)
+    query = f"""
+    SELECT {LIST_COLUMNS}
+    FROM candidates c
+    JOIN evaluations e ON c.id = e.candidate_id
+    WHERE {where}
+    ORDER BY e.overall_match DESC, e.id
+    LIMIT ? OFFSET ?
+    """
+    df = pd.read_sql(query, get_connection(), params=params + [page_size, page * page_size])
+    df['full_name'] = df['first_name'] + ' ' + df['last_name']
+    return df
+
+
+def get_change_marker():
+    """Id of the newest evaluation; changes whenever create_evaluation writes a row"""
+    return get_connection().execute("SELECT COALESCE(MAX(id), 0) FROM evaluations").fetchone()[0]
+
+
+def get_new_candidates(role_id, status, since_evaluation_id):
+    """List-view rows for evaluations newer than since_evaluation_id"""
+    where, params = _role_filter(role_id, status)
+    query = f"""
+    SELECT {LIST_COLUMNS}
+    FROM candidates c
+    JOIN evaluations e ON c.id = e.candidate_id
+    WHERE {where} AND e.id > ?
+    ORDER BY e.id DESC
+    """
+    df = pd.read_sql(query, get_connection(), params=params + [since_evaluation_id])
+    df['full_name'] = df['first_name'] + ' ' + df['last_name']
+    return df
+
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL)
+def get_analysis_notes(evaluation_ids):
+    """analysis_notes for a tuple of evaluation ids, as {evaluation_id: notes}"""
+    if not evaluation_ids:
+        return {}
+    placeholders = ",".join("?" * len(evaluation_ids))
+    rows = get_connection().execute(
+        f"SELECT id, analysis_notes FROM evaluations WHERE id IN ({placeholders})",
+        list(evaluation_ids)
+    ).fetchall()
+    return dict(rows)
+
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL)
+def get_resumes(candidate_ids):
+    """Resume text for a tuple of candidate ids, as {candidate_id: resume}"""
+    if not candidate_ids:
+        return {}
+    placeholders = ",".join("?" * len(candidate_ids))
+    rows = get_connection().execute(
+        f"SELECT id, resume FROM candidates WHERE id IN ({placeholders})",
+        list(candidate_ids)
+    ).fetchall()
+    return dict(rows)
+
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL)
+def search_candidates(query, k, method):
+    """Top-k candidates across all stored resumes, as a DataFrame"""
+    results = candidate_search.search_candidates(query, k, method, conn=get_connection())
+    return pd.DataFrame(results, columns=["id", "first_name", "last_name", "email", "submission_date", "status", "score", "snippet"])
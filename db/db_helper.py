@@ -1,32 +1,97 @@
 import datetime
 import sqlite3
+import threading
+from contextlib import contextmanager
+import numpy as np
 from dotenv import load_dotenv
+from tracing import traced
 import os
 
 load_dotenv()
 DATABASE_PATH = os.getenv('DATABASE_PATH')
+DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000'))
+DB_BULK_BATCH_SIZE = int(os.getenv('DB_BULK_BATCH_SIZE', '1000'))
+
+CANDIDATE_INSERT = "INSERT INTO candidates (email, first_name, last_name, resume, submission_date, status) VALUES (?, ?, ?, ?, ?, ?)"
+EVALUATION_INSERT = """
+    INSERT INTO evaluations 
+    (candidate_id, role_id, technical_skills, experience_level, 
+    domain_knowledge, culture_fit, overall_match, recommendation,
+    analysis_notes) 
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+CANDIDATE_VECTOR_INSERT = "INSERT OR REPLACE INTO candidate_vectors (candidate_id, vector) VALUES (?, ?)"
+
+_local = threading.local()
+
+def _configure_connection(conn):
+    """Pragmas applied once when a thread opens its connection"""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA temp_store=MEMORY")
 
 def get_connection():
-    return sqlite3.connect(DATABASE_PATH)
+    """Return this thread's persistent connection, opening it on first use"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        # Autocommit mode: writes are grouped explicitly with transaction()
+        conn = sqlite3.connect(DATABASE_PATH, timeout=DB_BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        _configure_connection(conn)
+        _local.conn = conn
+        _local.depth = 0
+    return conn
 
-def create_role(record):
+def close_connection():
+    """Close this thread's connection, e.g. when a worker thread exits"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+@contextmanager
+def transaction():
+    """Run the enclosed helper calls in one transaction on this thread's connection.
+
+    Nested blocks join the outermost transaction, which commits when it exits
+    and rolls back if an exception escapes it.
+    """
     conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO roles (title, description, url, status) VALUES (?, ?, ?, ?)",
-               (record["title"], record["description"], record["url"], record["status"]))
-    conn.commit()
-    conn.close()
+    if _local.depth == 0:
+        conn.execute("BEGIN IMMEDIATE")
+    _local.depth += 1
+    try:
+        yield conn
+    except BaseException:
+        _local.depth -= 1
+        if _local.depth == 0:
+            conn.execute("ROLLBACK")
+        raise
+    else:
+        _local.depth -= 1
+        if _local.depth == 0:
+            conn.execute("COMMIT")
+
+@traced("db.create_role")
+def create_role(record):
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO roles (title, description, url, status, fast_mode) VALUES (?, ?, ?, ?, ?)",
+                   (record["title"], record["description"], record["url"], record["status"],
+                    int(record.get("fast_mode", 0))))
 
+@traced("db.get_candidate")
 def get_candidate(email):
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM candidates WHERE email = ?", (email,))
+    # Repeat applicants have one row per submission; the newest one is current
+    cursor.execute("SELECT * FROM candidates WHERE email = ? ORDER BY id DESC LIMIT 1", (email,))
     column_names = [description[0] for description in cursor.description]
     results = list(cursor.fetchone())
     candidate = dict(zip(column_names, results))
-    conn.close()
     return candidate
 
+@traced("db.get_role")
 def get_role(title):
     conn = get_connection()
     cursor = conn.cursor()
@@ -34,58 +99,132 @@ def get_role(title):
     column_names = [description[0] for description in cursor.description]
     results = list(cursor.fetchone())
     role = dict(zip(column_names, results))
-    conn.close()
     return role
 
-def create_candidate(record):
+@traced("db.get_role_candidates")
+def get_role_candidates(role_id):
+    """Return every candidate that has at least one evaluation for the role"""
     conn = get_connection()
-    today = datetime.date.today()
     cursor = conn.cursor()
-    cursor.execute("INSERT INTO candidates (email, first_name, last_name, resume, submission_date, status) VALUES (?, ?, ?, ?, ?, ?)",
-               (record["email"], record["first_name"], record["last_name"], record["resume"], str(today), "Submitted"))
-    candidate_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return cursor.lastrowid
+    cursor.execute(
+        """
+        SELECT DISTINCT c.* FROM candidates c
+        JOIN evaluations e ON e.candidate_id = c.id
+        WHERE e.role_id = ?
+        """,
+        (role_id,)
+    )
+    column_names = [description[0] for description in cursor.description]
+    candidates = [dict(zip(column_names, row)) for row in cursor.fetchall()]
+    return candidates
+
+def _resume_vectors(resumes):
+    """float16 search vector blobs for candidate_vectors, computed before the write transaction starts"""
+    # text_index imports this module, so it can only be imported once both are loaded
+    from text_index import vectorize
+    return [vectorize(resume).astype(np.float16).tobytes() for resume in resumes]
+
+@traced("db.create_candidate")
+def create_candidate(record):
+    today = datetime.date.today()
+    [vector] = _resume_vectors([record["resume"]])
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute(CANDIDATE_INSERT,
+                   (record["email"], record["first_name"], record["last_name"], record["resume"], str(today), "Submitted"))
+        candidate_id = cursor.lastrowid
+        cursor.execute(CANDIDATE_VECTOR_INSERT, (candidate_id, vector))
+    return candidate_id
 
 
+@traced("db.update_candidate_status")
 def update_candidate_status(candidate_id, new_status):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE candidates SET status = ? WHERE id = ?",
-        (new_status, candidate_id)
-    )
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE candidates SET status = ? WHERE id = ?",
+            (new_status, candidate_id)
+        )
 
+@traced("db.create_evaluation")
 def create_evaluation(candidate_id, role_id, evaluation):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-            """
-            INSERT INTO evaluations 
-            (candidate_id, role_id, technical_skills, experience_level, 
-            domain_knowledge, culture_fit, overall_match, recommendation,
-            analysis_notes) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, 
-            (
-                candidate_id,
-                role_id,
-                evaluation.get('technical_skills', 0),
-                evaluation.get('experience_level', 0),
-                evaluation.get('domain_knowledge', 0),
-                evaluation.get('culture_fit', 0),
-                evaluation.get('overall_match', 0),
-                evaluation.get('recommendation', 0),
-                evaluation.get('analysis_notes', 0),
-            )
-        )
-    evaluation_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute(EVALUATION_INSERT, _evaluation_row(candidate_id, role_id, evaluation))
+        evaluation_id = cursor.lastrowid
     return evaluation_id
 
+@traced("db.replace_evaluation")
+def replace_evaluation(candidate_id, role_id, evaluation):
+    """Insert an evaluation that supersedes the candidate's earlier ones for the role, as batch re-screening does.
 
-    
\ No newline at end of file
+    The old rows are deleted in the same transaction, and the delete trigger
+    takes them out of role_stats.
+    """
+    with transaction() as conn:
+        conn.execute("DELETE FROM evaluations WHERE candidate_id = ? AND role_id = ?", (candidate_id, role_id))
+        return create_evaluation(candidate_id, role_id, evaluation)
+
+def _evaluation_row(candidate_id, role_id, evaluation):
+    return (
+        candidate_id,
+        role_id,
+        evaluation.get('technical_skills', 0),
+        evaluation.get('experience_level', 0),
+        evaluation.get('domain_knowledge', 0),
+        evaluation.get('culture_fit', 0),
+        evaluation.get('overall_match', 0),
+        evaluation.get('recommendation', 0),
+        evaluation.get('analysis_notes', 0),
+    )
+
+def _insert_bulk(sql, rows, batch_size):
+    """executemany rows in chunks of batch_size inside one transaction; returns the new row ids in order"""
+    ids = []
+    batch = []
+    with transaction() as conn:
+        cursor = conn.cursor()
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                ids.extend(_insert_batch(conn, cursor, sql, batch))
+                batch = []
+        if batch:
+            ids.extend(_insert_batch(conn, cursor, sql, batch))
+    return ids
+
+def _insert_batch(conn, cursor, sql, batch):
+    cursor.executemany(sql, batch)
+    # The write lock is held for the whole transaction, so the batch got consecutive rowids
+    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    return range(last_id - len(batch) + 1, last_id + 1)
+
+@traced("db.create_candidates_bulk")
+def create_candidates_bulk(records, batch_size=DB_BULK_BATCH_SIZE):
+    """Insert many candidate records and their search vectors in one transaction and return their ids"""
+    today = str(datetime.date.today())
+    rows = [
+        (
+            record["email"],
+            record["first_name"],
+            record["last_name"],
+            record.get("resume", ""),
+            record.get("submission_date") or today,
+            record.get("status") or "Submitted",
+        )
+        for record in records
+    ]
+    vectors = _resume_vectors(row[3] for row in rows)
+    with transaction() as conn:
+        candidate_ids = _insert_bulk(CANDIDATE_INSERT, rows, batch_size)
+        conn.executemany(CANDIDATE_VECTOR_INSERT, zip(candidate_ids, vectors))
+    return candidate_ids
+
+@traced("db.create_evaluations_bulk")
+def create_evaluations_bulk(evaluations, batch_size=DB_BULK_BATCH_SIZE):
+    """Insert many evaluations (dicts carrying candidate_id and role_id) in one transaction and return their ids"""
+    rows = (
+        _evaluation_row(evaluation['candidate_id'], evaluation['role_id'], evaluation)
+        for evaluation in evaluations
+    )
+    return _insert_bulk(EVALUATION_INSERT, rows, batch_size)
@@ -0,0 +1,226 @@
+import sqlite3
+from db.db_helper import get_connection
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Ordered (version, description, sql) steps; the applied version is kept in PRAGMA user_version.
+# Never edit a released migration, append a new one instead.
+MIGRATIONS = [
+    (1, "initial schema", """
+        CREATE TABLE IF NOT EXISTS roles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            url TEXT,
+            status TEXT
+        );
+        CREATE TABLE IF NOT EXISTS candidates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT NOT NULL,
+            first_name TEXT,
+            last_name TEXT,
+            resume TEXT,
+            submission_date TEXT,
+            status TEXT
+        );
+        CREATE TABLE IF NOT EXISTS evaluations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            candidate_id INTEGER NOT NULL REFERENCES candidates (id),
+            role_id INTEGER NOT NULL REFERENCES roles (id),
+            technical_skills REAL,
+            experience_level REAL,
+            domain_knowledge REAL,
+            culture_fit REAL,
+            overall_match REAL,
+            recommendation TEXT,
+            analysis_notes TEXT
+        );
+    """),
+    (2, "lookup and dashboard indexes", """
+        CREATE INDEX IF NOT EXISTS idx_evaluations_role_match
+            ON evaluations (role_id, overall_match DESC, candidate_id);
+        CREATE INDEX IF NOT EXISTS idx_evaluations_candidate
+            ON evaluations (candidate_id);
+        CREATE INDEX IF NOT EXISTS idx_candidates_email
+            ON candidates (email);
+        CREATE INDEX IF NOT EXISTS idx_roles_title
+            ON roles (title);
+    """),
+    (3, "per-role aggregate table", """
+        CREATE TABLE IF NOT EXISTS role_stats (
+            role_id INTEGER PRIMARY KEY,
+            evaluation_count INTEGER NOT NULL DEFAULT 0,
+            technical_skills_sum REAL NOT NULL DEFAULT 0,
+            experience_level_sum REAL NOT NULL DEFAULT 0,
+            domain_knowledge_sum REAL NOT NULL DEFAULT 0,
+            culture_fit_sum REAL NOT NULL DEFAULT 0,
+            overall_match_sum REAL NOT NULL DEFAULT 0,
+            -- bucket_i counts overall_match in [10*i, 10*i + 10), bucket_9 includes 100
+            bucket_0 INTEGER NOT NULL DEFAULT 0,
+            bucket_1 INTEGER NOT NULL DEFAULT 0,
+            bucket_2 INTEGER NOT NULL DEFAULT 0,
+            bucket_3 INTEGER NOT NULL DEFAULT 0,
+            bucket_4 INTEGER NOT NULL DEFAULT 0,
+            bucket_5 INTEGER NOT NULL DEFAULT 0,
+            bucket_6 INTEGER NOT NULL DEFAULT 0,
+            bucket_7 INTEGER NOT NULL DEFAULT 0,
+            bucket_8 INTEGER NOT NULL DEFAULT 0,
+            bucket_9 INTEGER NOT NULL DEFAULT 0,
+            interview_count INTEGER NOT NULL DEFAULT 0,
+            review_count INTEGER NOT NULL DEFAULT 0,
+            reject_count INTEGER NOT NULL DEFAULT 0
+        );
+        INSERT OR REPLACE INTO role_stats
+        SELECT
+            role_id,
+            COUNT(*),
+            SUM(COALESCE(technical_skills, 0)),
+            SUM(COALESCE(experience_level, 0)),
+            SUM(COALESCE(domain_knowledge, 0)),
+            SUM(COALESCE(culture_fit, 0)),
+            SUM(COALESCE(overall_match, 0)),
+            SUM(CASE WHEN MIN(MAX(CAST(COALESCE(overall_match, 0) / 10 AS INTEGER), 0), 9) = 0 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN MIN(MAX(CAST(COALESCE(overall_match, 0) / 10 AS INTEGER), 0), 9) = 1 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN MIN(MAX(CAST(COALESCE(overall_match, 0) / 10 AS INTEGER), 0), 9) = 2 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN MIN(MAX(CAST(COALESCE(overall_match, 0) / 10 AS INTEGER), 0), 9) = 3 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN MIN(MAX(CAST(COALESCE(overall_match, 0) / 10 AS INTEGER), 0), 9) = 4 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN MIN(MAX(CAST(COALESCE(overall_match, 0) / 10 AS INTEGER), 0), 9) = 5 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN MIN(MAX(CAST(COALESCE(overall_match, 0) / 10 AS INTEGER), 0), 9) = 6 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN MIN(MAX(CAST(COALESCE(overall_match, 0) / 10 AS INTEGER), 0), 9) = 7 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN MIN(MAX(CAST(COALESCE(overall_match, 0) / 10 AS INTEGER), 0), 9) = 8 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN MIN(MAX(CAST(COALESCE(overall_match, 0) / 10 AS INTEGER), 0), 9) = 9 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN LOWER(recommendation) = 'move to interview' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN LOWER(recommendation) = 'further review' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN LOWER(recommendation) = 'do not proceed' THEN 1 ELSE 0 END)
+        FROM evaluations
+        GROUP BY role_id;
+        CREATE TRIGGER IF NOT EXISTS trg_evaluations_insert_role_stats AFTER INSERT ON evaluations
+        BEGIN
+            INSERT OR IGNORE INTO role_stats (role_id) VALUES (NEW.role_id);
+            UPDATE role_stats SET
+                evaluation_count = evaluation_count + 1,
+                technical_skills_sum = technical_skills_sum + COALESCE(NEW.technical_skills, 0),
+                experience_level_sum = experience_level_sum + COALESCE(NEW.experience_level, 0),
+                domain_knowledge_sum = domain_knowledge_sum + COALESCE(NEW.domain_knowledge, 0),
+                culture_fit_sum = culture_fit_sum + COALESCE(NEW.culture_fit, 0),
+                overall_match_sum = overall_match_sum + COALESCE(NEW.overall_match, 0),
+                bucket_0 = bucket_0 + (CASE WHEN MIN(MAX(CAST(COALESCE(NEW.overall_match, 0) / 10 AS INTEGER), 0), 9) = 0 THEN 1 ELSE 0 END),
+                bucket_1 = bucket_1 + (CASE WHEN MIN(MAX(CAST(COALESCE(NEW.overall_match, 0) / 10 AS INTEGER), 0), 9) = 1 THEN 1 ELSE 0 END),
+                bucket_2 = bucket_2 + (CASE WHEN MIN(MAX(CAST(COALESCE(NEW.overall_match, 0) / 10 AS INTEGER), 0), 9) = 2 THEN 1 ELSE 0 END),
+                bucket_3 = bucket_3 + (CASE WHEN MIN(MAX(CAST(COALESCE(NEW.overall_match, 0) / 10 AS INTEGER), 0), 9) = 3 THEN 1 ELSE 0 END),
+                bucket_4 = bucket_4 + (CASE WHEN MIN(MAX(CAST(COALESCE(NEW.overall_match, 0) / 10 AS INTEGER), 0), 9) = 4 THEN 1 ELSE 0 END),
+                bucket_5 = bucket_5 + (CASE WHEN MIN(MAX(CAST(COALESCE(NEW.overall_match, 0) / 10 AS INTEGER), 0), 9) = 5 THEN 1 ELSE 0 END),
+                bucket_6 = bucket_6 + (CASE WHEN MIN(MAX(CAST(COALESCE(NEW.overall_match, 0) / 10 AS INTEGER), 0), 9) = 6 THEN 1 ELSE 0 END),
+                bucket_7 = bucket_7 + (CASE WHEN MIN(MAX(CAST(COALESCE(NEW.overall_match, 0) / 10 AS INTEGER), 0), 9) = 7 THEN 1 ELSE 0 END),
+                bucket_8 = bucket_8 + (CASE WHEN MIN(MAX(CAST(COALESCE(NEW.overall_match, 0) / 10 AS INTEGER), 0), 9) = 8 THEN 1 ELSE 0 END),
+                bucket_9 = bucket_9 + (CASE WHEN MIN(MAX(CAST(COALESCE(NEW.overall_match, 0) / 10 AS INTEGER), 0), 9) = 9 THEN 1 ELSE 0 END),
+                interview_count = interview_count + (CASE WHEN LOWER(NEW.recommendation) = 'move to interview' THEN 1 ELSE 0 END),
+                review_count = review_count + (CASE WHEN LOWER(NEW.recommendation) = 'further review' THEN 1 ELSE 0 END),
+                reject_count = reject_count + (CASE WHEN LOWER(NEW.recommendation) = 'do not proceed' THEN 1 ELSE 0 END)
+            WHERE role_id = NEW.role_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_evaluations_delete_role_stats AFTER DELETE ON evaluations
+        BEGIN
+            UPDATE role_stats SET
+                evaluation_count = evaluation_count - 1,
+                technical_skills_sum = technical_skills_sum - COALESCE(OLD.technical_skills, 0),
+                experience_level_sum = experience_level_sum - COALESCE(OLD.experience_level, 0),
+                domain_knowledge_sum = domain_knowledge_sum - COALESCE(OLD.domain_knowledge, 0),
+                culture_fit_sum = culture_fit_sum - COALESCE(OLD.culture_fit, 0),
+                overall_match_sum = overall_match_sum - COALESCE(OLD.overall_match, 0),
+                bucket_0 = bucket_0 - (CASE WHEN MIN(MAX(CAST(COALESCE(OLD.overall_match, 0) / 10 AS INTEGER), 0), 9) = 0 THEN 1 ELSE 0 END),
+                bucket_1 = bucket_1 - (CASE WHEN MIN(MAX(CAST(COALESCE(OLD.overall_match, 0) / 10 AS INTEGER), 0), 9) = 1 THEN 1 ELSE 0 END),
+                bucket_2 = bucket_2 - (CASE WHEN MIN(MAX(CAST(COALESCE(OLD.overall_match, 0) / 10 AS INTEGER), 0), 9) = 2 THEN 1 ELSE 0 END),
+                bucket_3 = bucket_3 - (CASE WHEN MIN(MAX(CAST(COALESCE(OLD.overall_match, 0) / 10 AS INTEGER), 0), 9) = 3 THEN 1 ELSE 0 END),
+                bucket_4 = bucket_4 - (CASE WHEN MIN(MAX(CAST(COALESCE(OLD.overall_match, 0) / 10 AS INTEGER), 0), 9) = 4 THEN 1 ELSE 0 END),
+                bucket_5 = bucket_5 - (CASE WHEN MIN(MAX(CAST(COALESCE(OLD.overall_match, 0) / 10 AS INTEGER), 0), 9) = 5 THEN 1 ELSE 0 END),
+                bucket_6 = bucket_6 - (CASE WHEN MIN(MAX(CAST(COALESCE(OLD.overall_match, 0) / 10 AS INTEGER), 0), 9) = 6 THEN 1 ELSE 0 END),
+                bucket_7 = bucket_7 - (CASE WHEN MIN(MAX(CAST(COALESCE(OLD.overall_match, 0) / 10 AS INTEGER), 0), 9) = 7 THEN 1 ELSE 0 END),
+                bucket_8 = bucket_8 - (CASE WHEN MIN(MAX(CAST(COALESCE(OLD.overall_match, 0) / 10 AS INTEGER), 0), 9) = 8 THEN 1 ELSE 0 END),
+                bucket_9 = bucket_9 - (CASE WHEN MIN(MAX(CAST(COALESCE(OLD.overall_match, 0) / 10 AS INTEGER), 0), 9) = 9 THEN 1 ELSE 0 END),
+                interview_count = interview_count - (CASE WHEN LOWER(OLD.recommendation) = 'move to interview' THEN 1 ELSE 0 END),
+                review_count = review_count - (CASE WHEN LOWER(OLD.recommendation) = 'further review' THEN 1 ELSE 0 END),
+                reject_count = reject_count - (CASE WHEN LOWER(OLD.recommendation) = 'do not proceed' THEN 1 ELSE 0 END)
+            WHERE role_id = OLD.role_id;
+        END;
+    """),
+    (4, "per-role fast mode flag", """
+        ALTER TABLE roles ADD COLUMN fast_mode INTEGER NOT NULL DEFAULT 0;
+    """),
+    (5, "role description vectors for the pre-filter", """
+        CREATE TABLE IF NOT EXISTS role_vectors (
+            role_id INTEGER PRIMARY KEY REFERENCES roles (id),
+            description_sha256 TEXT NOT NULL,
+            dim INTEGER NOT NULL,
+            vector BLOB NOT NULL
+        );
+    """),
+    (6, "candidate search index", """
+        CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5(
+            first_name, last_name, resume,
+            content='candidates', content_rowid='id'
+        );
+        CREATE TABLE IF NOT EXISTS candidate_vectors (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            candidate_id INTEGER NOT NULL UNIQUE REFERENCES candidates (id),
+            vector BLOB NOT NULL
+        );
+        CREATE TRIGGER IF NOT EXISTS trg_candidates_fts_insert AFTER INSERT ON candidates
+        BEGIN
+            INSERT INTO candidates_fts (rowid, first_name, last_name, resume)
+            VALUES (NEW.id, NEW.first_name, NEW.last_name, NEW.resume);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_candidates_fts_delete AFTER DELETE ON candidates
+        BEGIN
+            INSERT INTO candidates_fts (candidates_fts, rowid, first_name, last_name, resume)
+            VALUES ('delete', OLD.id, OLD.first_name, OLD.last_name, OLD.resume);
+            DELETE FROM candidate_vectors WHERE candidate_id = OLD.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_candidates_fts_update AFTER UPDATE OF first_name, last_name, resume ON candidates
+        BEGIN
+            INSERT INTO candidates_fts (candidates_fts, rowid, first_name, last_name, resume)
+            VALUES ('delete', OLD.id, OLD.first_name, OLD.last_name, OLD.resume);
+            INSERT INTO candidates_fts (rowid, first_name, last_name, resume)
+            VALUES (NEW.id, NEW.first_name, NEW.last_name, NEW.resume);
+            DELETE FROM candidate_vectors WHERE candidate_id = OLD.id;
+        END;
+        INSERT INTO candidates_fts (candidates_fts) VALUES ('rebuild');
+    """),
+]
+
+
+class MigrationError(Exception):
+    """Raised when a migration cannot be applied; the database is left at the previous version"""
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def apply_migrations(conn=None):
+    """Apply every migration newer than the database's schema version; returns the new version"""
+    if conn is None:
+        conn = get_connection()
+    current = get_schema_version(conn)
+    for version, description, sql in MIGRATIONS:
+        if version <= current:
+            continue
+        logger.info("Applying database migration %d: %s", version, description)
+        try:
+            conn.executescript(f"BEGIN IMMEDIATE; {sql} PRAGMA user_version = {version}; COMMIT;")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            path = conn.execute("PRAGMA database_list").fetchone()[2]
+            raise MigrationError(
+                f"Database migration {version} ({description}) failed on {path or 'the database'}: {e}. "
+                f"The schema is still at version {current}."
+            ) from e
+        current = version
+    return current
+
+if __name__ == '__main__':
+    try:
+        print(f"Database schema is at version {apply_migrations()}")
+    except MigrationError as e:
+        raise SystemExit(str(e))
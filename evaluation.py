@@ -1,17 +1,22 @@
 from flask import Flask, request, jsonify
 import os
 from db.db_helper import *
+from db.migrations import apply_migrations, MigrationError
 from utils import extract_resume, process_answers
 from dotenv import load_dotenv
 import os
-import anthropic
-import threading
-from agents.WorkflowOrchestrator import WorkflowOrchestrator
+from llm_client import get_orchestrator, pool_stats
+from job_queue import JobQueue, WorkerPool, QueueFullError
+from agents.RateLimiter import get_rate_limiter
+from tracing import render_metrics
+from logger import get_logger, LazyJSON
 
 app = Flask(__name__)
 
 load_dotenv()
-ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
+QUEUE_FULL_RETRY_AFTER = os.getenv('QUEUE_FULL_RETRY_AFTER', '60')
+
+logger = get_logger(__name__)
 
 
 @app.route('/')
@@ -48,47 +53,80 @@ def print_banner():
 
     
 
+@app.route('/pool-stats')
+def llm_pool_stats():
+    """Anthropic connection reuse counters, to check keep-alive under load"""
+    return jsonify(pool_stats())
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus text exposition of per-stage latency, tokens and cache hits, plus queue, limiter and pool gauges"""
+    gauges = {f"talentnexus_jobs_{status}": count for status, count in job_queue.counts().items()}
+    gauges.update({f"talentnexus_llm_limiter_{name}": value for name, value in get_rate_limiter().stats().items()})
+    gauges.update({f"talentnexus_llm_pool_{name}": value for name, value in pool_stats().items()})
+    return render_metrics(gauges), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+
 @app.route('/webhook', methods=['POST'])
 def handle_webhook():
     data = request.json.copy()  # Make a copy of the data
     
     # Store the data for processing
     if 'form_response' in data and 'answers' in data['form_response']:
-        # Start processing in background thread
-        import threading
-        thread = threading.Thread(target=process_webhook_data, args=(data,))
-        thread.daemon = True
-        thread.start()
+        # Queue the submission for the worker pool
+        try:
+            job_id = job_queue.enqueue(data)
+        except QueueFullError as e:
+            logger.warning("Rejecting webhook: %s", e)
+            response = jsonify(status="error", message="Server busy, retry later")
+            response.headers['Retry-After'] = QUEUE_FULL_RETRY_AFTER
+            return response, 503
         
         # Return success immediately
-        return jsonify(status="success", message="Processing started"), 200
+        return jsonify(status="success", message="Processing started", job_id=job_id), 200
     else:
         return jsonify(status="error", message="Invalid data format"), 400
 
 def process_webhook_data(data):
-    """Process webhook data in background thread"""
+    """Process webhook data in a worker pool thread"""
     try:
         # Extract answers from the webhook data
         answers = data['form_response']['answers']
-        print("#"*50 + " FORM ANSWERS RECEIVED " + "#"*50)
-        print("PROCESSING ANSWERS...")
+        logger.info("FORM ANSWERS RECEIVED, processing answers...")
         response = process_answers(answers)
-        print("Processed response:", response)
+        logger.debug("Processed response:\n%s", LazyJSON(response))
         
         # Extract resume URL and convert to text
         candidate = get_candidate(response["email"])
-        role = get_role(response["role_title"])
+        candidate["resume_url"] = response.get("file_url")
+        roles = [get_role(title) for title in response["role_titles"]]
 
-        # Create & run orchestrator
-        client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-        print("#"*50 + " LAUNCHING AGENTS... " + "#"*50)
-        orchestrator = WorkflowOrchestrator(client)
-        result = orchestrator.process_new_candidate(candidate, role)
+        # Run the process-wide orchestrator, which reuses one client and connection pool
+        logger.info("LAUNCHING AGENTS...")
+        orchestrator = get_orchestrator()
+        if len(roles) > 1:
+            result = orchestrator.process_candidate_for_roles(candidate, roles)
+        else:
+            result = orchestrator.process_new_candidate(candidate, roles[0])
 
-        print("Webhook processing completed successfully")
+        logger.info("Webhook processing completed successfully")
 
     except Exception as e:
-        print(f"Error processing webhook: {str(e)}")
+        logger.error("Error processing webhook: %s", e)
+        raise
+
+try:
+    apply_migrations()
+except MigrationError as e:
+    # Stop with the migration that failed instead of an import traceback
+    raise SystemExit(f"TalentNexus cannot start: {e}")
+job_queue = JobQueue()
+worker_pool = WorkerPool(job_queue, process_webhook_data)
+# Start with the app, so jobs queued before a restart are picked up without waiting for a new webhook.
+# The PDF extraction processes re-import this module as __mp_main__ and must not run workers.
+if __name__ != '__mp_main__':
+    worker_pool.start()
 
 if __name__ == '__main__':
     print_banner()
@@ -0,0 +1,100 @@
+import argparse
+import csv
+import json
+import time
+from db.db_helper import (
+    DB_BULK_BATCH_SIZE,
+    create_candidates_bulk,
+    create_evaluations_bulk,
+    get_connection,
+    transaction,
+)
+from db.migrations import apply_migrations
+
+SCORE_COLUMNS = ["technical_skills", "experience_level", "domain_knowledge", "culture_fit", "overall_match"]
+
+
+def read_records(path):
+    """Yield applicant records from a .csv or .jsonl file"""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def evaluation_from_record(record, candidate_id, role_ids):
+    """Build an evaluation row when the record carries a role title and an overall score"""
+    if not record.get("role_title") or record.get("overall_match") in (None, ""):
+        return None
+    role_id = role_ids.get(record["role_title"])
+    if role_id is None:
+        raise ValueError(f"Unknown role: {record['role_title']}")
+    evaluation = {
+        "candidate_id": candidate_id,
+        "role_id": role_id,
+        "recommendation": record.get("recommendation"),
+        "analysis_notes": record.get("analysis_notes", ""),
+    }
+    for column in SCORE_COLUMNS:
+        value = record.get(column)
+        evaluation[column] = float(value) if value not in (None, "") else 0
+    return evaluation
+
+
+def import_applicants(path, batch_size=DB_BULK_BATCH_SIZE):
+    """Load historical applicants, and their evaluations if present, in a single transaction"""
+    conn = get_connection()
+    existing_emails = {row[0] for row in conn.execute("SELECT email FROM candidates")}
+    role_ids = {title: role_id for role_id, title in conn.execute("SELECT id, title FROM roles")}
+
+    imported = skipped = evaluations = 0
+    chunk = []
+    with transaction():
+        for record in read_records(path):
+            email = record.get("email")
+            if not email or email in existing_emails:
+                skipped += 1
+                continue
+            existing_emails.add(email)
+            chunk.append(record)
+            if len(chunk) >= batch_size:
+                evaluations += _import_chunk(chunk, role_ids, batch_size)
+                imported += len(chunk)
+                chunk = []
+        if chunk:
+            evaluations += _import_chunk(chunk, role_ids, batch_size)
+            imported += len(chunk)
+    return imported, skipped, evaluations
+
+
+def _import_chunk(records, role_ids, batch_size):
+    candidate_ids = create_candidates_bulk(records, batch_size)
+    rows = [
+        evaluation_from_record(record, candidate_id, role_ids)
+        for record, candidate_id in zip(records, candidate_ids)
+    ]
+    rows = [row for row in rows if row is not None]
+    create_evaluations_bulk(rows, batch_size)
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import historical applicants from a CSV or JSONL file")
+    parser.add_argument("path", help="CSV or JSONL file with email, first_name, last_name, resume and optional "
+                                     "submission_date, status, role_title and score columns")
+    parser.add_argument("--batch-size", type=int, default=DB_BULK_BATCH_SIZE)
+    args = parser.parse_args()
+
+    apply_migrations()
+    start = time.time()
+    imported, skipped, evaluations = import_applicants(args.path, args.batch_size)
+    print(f"Imported {imported} candidates and {evaluations} evaluations in {time.time() - start:.1f}s "
+          f"({skipped} skipped as duplicates or missing email)")
+
+
+if __name__ == '__main__':
+    main()
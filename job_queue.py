@@ -0,0 +1,263 @@
+import datetime
+import json
+import os
+import socket
+import sqlite3
+import threading
+import uuid
+from dotenv import load_dotenv
+from logger import get_logger
+
+load_dotenv()
+JOB_QUEUE_PATH = os.getenv('JOB_QUEUE_PATH', os.path.join(os.path.dirname(__file__), 'db', 'jobs.db'))
+JOB_QUEUE_MAX_SIZE = int(os.getenv('JOB_QUEUE_MAX_SIZE', '500'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+WORKER_POOL_SIZE = int(os.getenv('WORKER_POOL_SIZE', '4'))
+# A running job whose lease is not renewed for this long belongs to a dead process and is requeued
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', '300'))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+logger = get_logger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds JOB_QUEUE_MAX_SIZE pending jobs"""
+
+
+class JobQueue:
+    """Durable FIFO of webhook payloads stored in SQLite.
+
+    A claimed job is leased to this queue's owner id for lease_seconds; the
+    worker pool renews the lease while the job runs, so only jobs of a process
+    that stopped renewing are recovered.
+    """
+
+    def __init__(self, path=JOB_QUEUE_PATH, max_size=JOB_QUEUE_MAX_SIZE, max_attempts=JOB_MAX_ATTEMPTS,
+                 lease_seconds=JOB_LEASE_SECONDS):
+        self.path = path
+        self.max_size = max_size
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._init_schema()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                owner TEXT,
+                lease_expires_at TEXT
+            )
+        """)
+        # Queues created before leases existed
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column in ("owner", "lease_expires_at"):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)")
+        conn.close()
+
+    def _lease_expiry(self):
+        return (datetime.datetime.now() + datetime.timedelta(seconds=self.lease_seconds)).isoformat()
+
+    def enqueue(self, payload):
+        """Store a payload as a queued job and return its id"""
+        now = datetime.datetime.now().isoformat()
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                pending = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (JOB_QUEUED, JOB_RUNNING)
+                ).fetchone()[0]
+                if pending >= self.max_size:
+                    conn.execute("ROLLBACK")
+                    raise QueueFullError(f"Job queue is full ({pending} pending jobs)")
+                cursor = conn.execute(
+                    "INSERT INTO jobs (payload, status, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                    (json.dumps(payload), JOB_QUEUED, now, now)
+                )
+                conn.execute("COMMIT")
+                job_id = cursor.lastrowid
+            finally:
+                conn.close()
+            self._available.notify()
+        return job_id
+
+    def claim(self, timeout=None):
+        """Mark the oldest queued job as running and return (id, payload), or None after timeout"""
+        with self._lock:
+            job = self._claim_next()
+            if job is None and timeout:
+                self._available.wait(timeout)
+                job = self._claim_next()
+        return job
+
+    def _claim_next(self):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, payload FROM jobs WHERE status = ? ORDER BY id LIMIT 1", (JOB_QUEUED,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, owner = ?, lease_expires_at = ?, updated_at = ? "
+                "WHERE id = ?",
+                (JOB_RUNNING, self.owner, self._lease_expiry(), datetime.datetime.now().isoformat(), row[0])
+            )
+            conn.execute("COMMIT")
+            return row[0], json.loads(row[1])
+        finally:
+            conn.close()
+
+    def _set_status(self, job_id, status, error=None):
+        # A job whose lease was lost has been handed to another owner, which now decides its status
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_expires_at = NULL, updated_at = ? WHERE id = ? AND owner = ?",
+                (status, error, datetime.datetime.now().isoformat(), job_id, self.owner)
+            )
+        finally:
+            conn.close()
+
+    def mark_done(self, job_id):
+        self._set_status(job_id, JOB_DONE)
+
+    def mark_failed(self, job_id, error):
+        self._set_status(job_id, JOB_FAILED, str(error))
+
+    def renew_leases(self):
+        """Extend the lease of every job this owner is running; returns how many were renewed"""
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE status = ? AND owner = ?",
+                (self._lease_expiry(), JOB_RUNNING, self.owner)
+            ).rowcount
+        finally:
+            conn.close()
+
+    def recover(self):
+        """Requeue running jobs whose lease has expired, as left by a crashed process; give up on those out of attempts.
+
+        Jobs that are still leased, by this process or a live one, are left alone.
+        """
+        now = datetime.datetime.now().isoformat()
+        expired = "status = ? AND (lease_expires_at IS NULL OR lease_expires_at < ?)"
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            failed = conn.execute(
+                f"UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE {expired} AND attempts >= ?",
+                (JOB_FAILED, "Exceeded max attempts after its worker stopped", now, JOB_RUNNING, now, self.max_attempts)
+            ).rowcount
+            requeued = conn.execute(
+                f"UPDATE jobs SET status = ?, owner = NULL, lease_expires_at = NULL, updated_at = ? WHERE {expired}",
+                (JOB_QUEUED, now, JOB_RUNNING, now)
+            ).rowcount
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        if failed or requeued:
+            logger.info("JOB QUEUE: Recovered %d interrupted jobs, marked %d as failed", requeued, failed)
+            if requeued:
+                with self._lock:
+                    self._available.notify_all()
+        return requeued
+
+    def counts(self):
+        """Return the number of jobs in each state"""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        finally:
+            conn.close()
+        counts = {JOB_QUEUED: 0, JOB_RUNNING: 0, JOB_DONE: 0, JOB_FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+
+class WorkerPool:
+    """Fixed number of threads draining a JobQueue through a handler function.
+
+    A heartbeat thread renews the leases of the running jobs and recovers
+    jobs whose lease expired in another process.
+    """
+
+    def __init__(self, queue, handler, size=WORKER_POOL_SIZE, poll_interval=1.0):
+        self.queue = queue
+        self.handler = handler
+        self.size = size
+        self.poll_interval = poll_interval
+        self._threads = []
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self.heartbeat_interval = queue.lease_seconds / 3
+
+    def start(self):
+        """Recover interrupted jobs and start the workers; calling it again is a no-op"""
+        with self._start_lock:
+            if self._threads:
+                return
+            self._stopping.clear()
+            self.queue.recover()
+            for i in range(self.size):
+                thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            heartbeat = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+            heartbeat.start()
+            self._threads.append(heartbeat)
+            logger.info("JOB QUEUE: Started %d workers", self.size)
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        with self.queue._lock:
+            self.queue._available.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _heartbeat(self):
+        while not self._stopping.wait(self.heartbeat_interval):
+            try:
+                self.queue.renew_leases()
+                self.queue.recover()
+            except sqlite3.Error as e:
+                logger.error("JOB QUEUE: Lease renewal failed: %s", e)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            job = self.queue.claim(timeout=self.poll_interval)
+            if job is None:
+                continue
+            job_id, payload = job
+            try:
+                self.handler(payload)
+                self.queue.mark_done(job_id)
+            except Exception as e:
+                logger.error("JOB QUEUE: Job %s failed: %s", job_id, e)
+                self.queue.mark_failed(job_id, e)
@@ -0,0 +1,119 @@
+import os
+import threading
+import anthropic
+import httpx
+from dotenv import load_dotenv
+from agents.WorkflowOrchestrator import WorkflowOrchestrator
+
+load_dotenv()
+ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
+LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', '100'))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('LLM_MAX_KEEPALIVE_CONNECTIONS', '50'))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv('LLM_KEEPALIVE_EXPIRY', '60'))
+LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', '10'))
+LLM_READ_TIMEOUT = float(os.getenv('LLM_READ_TIMEOUT', '600'))
+
+
+class PoolStats:
+    """Counts HTTP requests and the new connections and TLS handshakes they needed"""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self._lock = threading.Lock()
+
+    def _record(self, event_name):
+        # httpcore reports each step of opening a connection; a reused connection reports none
+        with self._lock:
+            if event_name == "connection.connect_tcp.complete":
+                self.new_connections += 1
+            elif event_name == "connection.start_tls.complete":
+                self.tls_handshakes += 1
+
+    def _trace(self, event_name, info):
+        self._record(event_name)
+
+    async def _atrace(self, event_name, info):
+        self._record(event_name)
+
+    def on_request(self, request):
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def aon_request(self, request):
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._atrace
+
+    def snapshot(self):
+        with self._lock:
+            reused = self.requests - self.new_connections
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "tls_handshakes": self.tls_handshakes,
+                "reused_connections": max(reused, 0),
+                "reuse_ratio": round(reused / self.requests, 3) if self.requests else None,
+            }
+
+
+_pool_stats = PoolStats()
+_lock = threading.Lock()
+_client = None
+_async_client = None
+_orchestrator = None
+
+def _limits():
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+    )
+
+def _timeout():
+    return httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+
+def get_client():
+    """Return the process-wide Anthropic client, sharing one keep-alive connection pool.
+
+    SDK retries are disabled because the agents' RateLimiter owns retrying.
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            http_client = anthropic.DefaultHttpxClient(
+                limits=_limits(),
+                timeout=_timeout(),
+                event_hooks={"request": [_pool_stats.on_request]},
+            )
+            _client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY, http_client=http_client, max_retries=0)
+        return _client
+
+def get_async_client():
+    """Return the process-wide AsyncAnthropic client; its pool belongs to one long-lived event loop"""
+    global _async_client
+    with _lock:
+        if _async_client is None:
+            http_client = anthropic.DefaultAsyncHttpxClient(
+                limits=_limits(),
+                timeout=_timeout(),
+                event_hooks={"request": [_pool_stats.aon_request]},
+            )
+            _async_client = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY, http_client=http_client, max_retries=0)
+        return _async_client
+
+def get_orchestrator():
+    """Return the process-wide WorkflowOrchestrator, built once on the shared clients"""
+    global _orchestrator
+    client = get_client()
+    async_client = get_async_client()
+    with _lock:
+        if _orchestrator is None:
+            _orchestrator = WorkflowOrchestrator(client, async_client)
+        return _orchestrator
+
+def pool_stats():
+    """Connection reuse counters for the shared clients"""
+    return _pool_stats.snapshot()
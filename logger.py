@@ -0,0 +1,79 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+# Records waiting for the writer thread; when it falls behind, new records are dropped rather than blocking callers
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+LOG_FORMAT = "[%(asctime)s] %(message)s"
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+ROOT_LOGGER = "talentnexus"
+
+
+class LazyJSON:
+    """Log argument that is serialised with json.dumps only if the record is emitted.
+
+    logger.debug("Evaluation:\\n%s", LazyJSON(evaluation)) costs nothing when
+    debug logging is off.
+    """
+
+    def __init__(self, value, indent=2):
+        self.value = value
+        self.indent = indent
+
+    def __str__(self):
+        return json.dumps(self.value, indent=self.indent, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: a record that does not fit in the queue is counted and dropped"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener = None
+_handler = None
+_lock = threading.Lock()
+
+def _configure():
+    """Attach the queue handler to the package logger and start the writer thread, once per process"""
+    global _listener, _handler
+    with _lock:
+        if _listener is not None:
+            return
+        log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT))
+        _handler = DroppingQueueHandler(log_queue)
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(_handler)
+        root.propagate = False
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+        _listener.start()
+        # Flush what is still queued when the process exits
+        atexit.register(_listener.stop)
+
+def get_logger(name):
+    """Logger for a module, e.g. get_logger(__name__); messages are written to stdout by a background thread"""
+    _configure()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+def dropped_records():
+    """Number of log records dropped because the queue was full"""
+    return _handler.dropped if _handler is not None else 0
@@ -0,0 +1,22 @@
+import argparse
+from db.db_helper import get_role
+from agents.BatchOrchestrator import BatchOrchestrator
+from llm_client import get_client
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-screen every candidate of a role using the Message Batches API")
+    parser.add_argument("role_title", help="Title of the role to re-screen")
+    args = parser.parse_args()
+
+    role = get_role(args.role_title)
+    orchestrator = BatchOrchestrator(get_client())
+    evaluation_ids = orchestrator.rescreen_role(role)
+    failed = sum(1 for evaluation_id in evaluation_ids.values() if evaluation_id is None)
+    print(f"Recorded {len(evaluation_ids) - failed} evaluations for {role['title']}")
+    if failed:
+        print(f"{failed} candidates were not re-screened and kept their previous evaluation")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+RESUME_CACHE_PATH = os.getenv('RESUME_CACHE_PATH', os.path.join(os.path.dirname(__file__), 'db', 'resume_cache.db'))
+RESUME_CACHE_MAX_BYTES = int(os.getenv('RESUME_CACHE_MAX_BYTES', str(200 * 1024 * 1024)))
+
+
+class ResumeCache:
+    """SQLite store of extracted resume text keyed on the SHA-256 of the downloaded file"""
+
+    def __init__(self, path=RESUME_CACHE_PATH, max_bytes=RESUME_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._init_schema()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS resume_text (
+                sha256 TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                parser_version TEXT NOT NULL,
+                page_count INTEGER,
+                text_bytes INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_resume_text_last_access ON resume_text (last_access)")
+        conn.commit()
+        conn.close()
+
+    def get(self, sha256, parser_version):
+        """Return (text, page_count) for a file hash parsed by parser_version, or None"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT text, page_count FROM resume_text WHERE sha256 = ? AND parser_version = ?",
+                (sha256, parser_version)
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE resume_text SET last_access = ? WHERE sha256 = ?", (time.time(), sha256))
+                conn.commit()
+        finally:
+            conn.close()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return row
+
+    def set(self, sha256, text, parser_version, page_count=None):
+        """Store extracted text, evicting least recently used entries beyond max_bytes"""
+        text_bytes = len(text.encode('utf-8'))
+        conn = self._connect()
+        try:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO resume_text (sha256, text, parser_version, page_count, text_bytes, last_access)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (sha256, text, parser_version, page_count, text_bytes, time.time())
+            )
+            total = conn.execute("SELECT COALESCE(SUM(text_bytes), 0) FROM resume_text").fetchone()[0]
+            if total > self.max_bytes:
+                rows = conn.execute("SELECT sha256, text_bytes FROM resume_text ORDER BY last_access").fetchall()
+                evicted = []
+                for key, size in rows:
+                    if total <= self.max_bytes or key == sha256:
+                        break
+                    evicted.append((key,))
+                    total -= size
+                conn.executemany("DELETE FROM resume_text WHERE sha256 = ?", evicted)
+            conn.commit()
+        finally:
+            conn.close()
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_resume_cache():
+    """Return the process-wide ResumeCache, creating it on first use"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ResumeCache()
+        return _shared_cache
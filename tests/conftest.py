@@ -0,0 +1,19 @@
+import os
+import tempfile
+
+# Settings are read when the app modules are imported, so point the databases
+# at a scratch directory before any test module imports them
+_workdir = tempfile.mkdtemp(prefix="talentnexus-tests-")
+os.environ.update({
+    "DATABASE_PATH": os.path.join(_workdir, "talentnexus.db"),
+    "JOB_QUEUE_PATH": os.path.join(_workdir, "jobs.db"),
+    "RESUME_CACHE_PATH": os.path.join(_workdir, "resume_cache.db"),
+    "LLM_CACHE_PATH": os.path.join(_workdir, "llm_cache.db"),
+    "DOWNLOAD_DIR": os.path.join(_workdir, "downloads"),
+    "LLM_CACHE_BYPASS": "1",
+    "TRACE_SINK": "none",
+    "LOG_LEVEL": "WARNING",
+    "LLM_MODEL": "test-model",
+    "ANTHROPIC_API_KEY": "test",
+})
+os.makedirs(os.environ["DOWNLOAD_DIR"])
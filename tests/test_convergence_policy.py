@@ -0,0 +1,18 @@
+from agents.ConvergencePolicy import ConvergencePolicy
+
+
+def test_remaining_calls_counts_reviews_and_re_evaluations_between_them():
+    policy = ConvergencePolicy(max_iterations=3)
+    # Fast mode skips three reviews and the two re-evaluations between them
+    assert policy.remaining_calls(1) == 5
+    # Stable scores after the first re-evaluation skip two reviews and one re-evaluation
+    assert policy.remaining_calls(2) == 3
+    assert policy.remaining_calls(3) == 1
+
+
+def test_record_saving_totals_per_rule():
+    policy = ConvergencePolicy(max_iterations=3)
+    policy.record_saving("prefilter", 1 + policy.remaining_calls(1))
+    policy.record_saving("fast_mode", policy.remaining_calls(1), 2)
+    policy.record_saving("score_stable", policy.remaining_calls(2))
+    assert policy.calls_saved == {"prefilter": 6, "fast_mode": 10, "score_stable": 3}
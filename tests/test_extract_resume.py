@@ -0,0 +1,42 @@
+import os
+import threading
+import pytest
+from benchmarks.fixtures import serve_directory, write_pdf
+from utils import DOWNLOAD_DIR, extract_resume
+
+ROUNDS = 10
+
+
+@pytest.fixture
+def uploads(tmp_path):
+    """Two candidates' resumes uploaded under the same file name, served over HTTP"""
+    texts = {}
+    for name in ("alice", "bob"):
+        os.makedirs(tmp_path / name)
+        texts[name] = f"{name} resume text"
+        write_pdf(tmp_path / name / "CV.pdf", texts[name])
+    server, base_url = serve_directory(tmp_path)
+    yield {name: f"{base_url}/{name}/CV.pdf" for name in texts}, texts
+    server.shutdown()
+
+
+def test_concurrent_uploads_with_the_same_file_name_keep_their_own_text(uploads):
+    urls, texts = uploads
+    for _ in range(ROUNDS):
+        barrier = threading.Barrier(len(urls))
+        results = {}
+
+        def extract(name):
+            barrier.wait()
+            results[name] = extract_resume(urls[name])
+
+        threads = [threading.Thread(target=extract, args=(name,)) for name in urls]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert {name: text.strip() for name, text in results.items()} == texts
+
+    # The cached text still matches each file, and no downloads are left behind
+    assert {name: extract_resume(url).strip() for name, url in urls.items()} == texts
+    assert os.listdir(DOWNLOAD_DIR) == []
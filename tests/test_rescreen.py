@@ -0,0 +1,69 @@
+import pytest
+from agents.BatchOrchestrator import BatchOrchestrator
+from benchmarks.fake_anthropic import EVALUATION, FakeAnthropic
+from db.db_helper import create_candidates_bulk, create_evaluation, create_role, get_connection, get_role
+from db.migrations import apply_migrations
+
+PREVIOUS_SCORE = 40
+
+
+@pytest.fixture
+def role(request):
+    apply_migrations()
+    title = f"Role for {request.node.name}"
+    create_role({"title": title, "description": "Python, SQL and data pipelines.", "url": "", "status": "Open"})
+    return get_role(title)
+
+
+def screened_candidates(role, count):
+    """Candidates with one earlier evaluation each for the role"""
+    ids = list(create_candidates_bulk([
+        {"first_name": "Ada", "last_name": f"Lovelace{i}", "email": f"{role['id']}-{i}@example.com",
+         "resume": "Python and SQL engineer."}
+        for i in range(count)
+    ]))
+    for candidate_id in ids:
+        create_evaluation(candidate_id, role['id'], {"overall_match": PREVIOUS_SCORE, "analysis_notes": "First screening"})
+    return ids
+
+
+def role_evaluations(role):
+    return get_connection().execute(
+        "SELECT candidate_id, overall_match FROM evaluations WHERE role_id = ? ORDER BY candidate_id", (role['id'],)
+    ).fetchall()
+
+
+def role_stats(role):
+    return get_connection().execute(
+        "SELECT evaluation_count, overall_match_sum FROM role_stats WHERE role_id = ?", (role['id'],)
+    ).fetchone()
+
+
+def test_rescreen_role_replaces_earlier_evaluations(role):
+    ids = screened_candidates(role, 3)
+    fake = FakeAnthropic(latency=0, jitter=0, review_rounds=1, score_jitter=0)
+
+    evaluation_ids = BatchOrchestrator(fake, poll_interval=0).rescreen_role(role)
+
+    assert sorted(evaluation_ids) == ids
+    assert all(evaluation_ids.values())
+    score = EVALUATION["overall_match"]
+    assert role_evaluations(role) == [(candidate_id, score) for candidate_id in ids]
+    assert role_stats(role) == (3, 3 * score)
+    # Evaluation, review and one improvement each; the unchanged score ends the loop without another review
+    assert fake.calls == {"evaluator": 6, "reviewer": 3}
+
+
+@pytest.mark.parametrize("failure", ["errored", "expired", "canceled"])
+def test_rescreen_role_keeps_previous_evaluation_of_failed_requests(role, failure):
+    ids = screened_candidates(role, 3)
+    fake = FakeAnthropic(latency=0, jitter=0, review_rounds=0, score_jitter=0)
+    fake.messages.batches.failures[f"candidate-{ids[1]}"] = failure
+
+    evaluation_ids = BatchOrchestrator(fake, poll_interval=0).rescreen_role(role)
+
+    assert evaluation_ids[ids[1]] is None
+    assert evaluation_ids[ids[0]] and evaluation_ids[ids[2]]
+    score = EVALUATION["overall_match"]
+    assert role_evaluations(role) == [(ids[0], score), (ids[1], PREVIOUS_SCORE), (ids[2], score)]
+    assert role_stats(role) == (3, 2 * score + PREVIOUS_SCORE)
@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from agents.EvaluatorAgent import EvaluatorAgent
+from agents.ResponseCache import ResponseCache
+from agents.ReviewerAgent import ReviewerAgent
+from benchmarks.fake_anthropic import EVALUATION, FakeAnthropic, FakeAsyncAnthropic
+
+CANDIDATE = {"first_name": "Ada", "last_name": "Lovelace", "resume": "Python and SQL engineer."}
+ROLE = {"title": "Data Engineer", "description": "Python, SQL and data pipelines."}
+OUT_OF_RANGE = dict(EVALUATION, overall_match=150)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(path=str(tmp_path / "llm_cache.db"), bypass=False)
+
+
+def fake_client(**kwargs):
+    return FakeAnthropic(latency=0, jitter=0, score_jitter=0, **kwargs)
+
+
+def cache_size(cache):
+    conn = cache._connect()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_invalid_evaluation_is_not_cached(cache):
+    bad = fake_client(evaluation=OUT_OF_RANGE)
+    assert EvaluatorAgent(bad, cache=cache).evaluate(CANDIDATE, ROLE) == {"error": "Failed to parse evaluation"}
+    assert cache_size(cache) == 0
+
+    good = fake_client()
+    agent = EvaluatorAgent(good, cache=cache)
+    assert agent.evaluate(CANDIDATE, ROLE)["overall_match"] == EVALUATION["overall_match"]
+    assert agent.evaluate(CANDIDATE, ROLE)["overall_match"] == EVALUATION["overall_match"]
+    # The second evaluation is served from the cache
+    assert good.calls["evaluator"] == 1
+    assert cache_size(cache) == 1
+
+
+def test_cached_response_that_fails_to_parse_is_replaced(cache):
+    good = fake_client()
+    agent = EvaluatorAgent(good, cache=cache)
+    request = agent._build_request(agent._build_prompt(CANDIDATE, ROLE), 1500, agent.system_prompt)
+    cache.set(cache.make_key(request), "not json")
+
+    assert agent.evaluate(CANDIDATE, ROLE)["overall_match"] == EVALUATION["overall_match"]
+    assert good.calls["evaluator"] == 1
+    assert agent.evaluate(CANDIDATE, ROLE)["overall_match"] == EVALUATION["overall_match"]
+    assert good.calls["evaluator"] == 1
+
+
+def test_async_review_that_fails_to_parse_is_not_cached(cache):
+    bad = fake_client(review_rounds=0, approved_review=["approved"])
+    agent = ReviewerAgent(bad, FakeAsyncAnthropic(bad), cache=cache)
+
+    review = asyncio.run(agent.areview(EVALUATION, CANDIDATE, ROLE, iteration=1))
+
+    assert review["status"] == "error"
+    assert cache_size(cache) == 0
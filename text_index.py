@@ -0,0 +1,126 @@
+import argparse
+import hashlib
+import os
+import re
+import zlib
+import numpy as np
+from dotenv import load_dotenv
+from db.db_helper import get_connection, get_role, transaction
+
+load_dotenv()
+TEXT_VECTOR_DIM = int(os.getenv('TEXT_VECTOR_DIM', '512'))
+# Opt-in: unrelated text already scores up to ~0.08, so calibrate per role with `python text_index.py <role>` first
+PREFILTER_THRESHOLD = float(os.getenv('PREFILTER_THRESHOLD', '0'))
+# overall_match from which a candidate is worth a human look ("Further review")
+CALIBRATION_MIN_MATCH = 60
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOPWORDS = frozenset("""
+    a about above after all also an and any are as at be been being both but by can could did do does
+    for from had has have having he her his how i if in into is it its just may me more most my no not
+    of on or our out over own same she should so some such than that the their them then there these
+    they this those through to too under up very was we were what when where which while who will with
+    would you your
+""".split())
+
+
+def tokenize(text):
+    """Lowercased word tokens without stopwords; keeps terms like c++ and c#"""
+    return [token for token in TOKEN_PATTERN.findall((text or "").lower()) if token not in STOPWORDS]
+
+
+def vectorize(text, dim=TEXT_VECTOR_DIM):
+    """L2-normalised hashed term-frequency vector (float32) for a piece of text.
+
+    Terms are hashed into dim buckets with a sign bit so collisions cancel
+    out on average, and counts are log-scaled so repeated words don't dominate.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    tokens = tokenize(text)
+    if not tokens:
+        return vector
+    hashes = np.fromiter((zlib.crc32(token.encode()) for token in tokens), dtype=np.uint32, count=len(tokens))
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, hashes % dim, signs)
+    vector = np.sign(vector) * np.log1p(np.abs(vector))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def to_blob(vector):
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def from_blob(blob):
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+def get_role_vector(role):
+    """Vector for a role description, cached in role_vectors until the description changes"""
+    description = role.get('description') or ""
+    digest = hashlib.sha256(description.encode('utf-8')).hexdigest()
+    row = get_connection().execute(
+        "SELECT vector FROM role_vectors WHERE role_id = ? AND description_sha256 = ? AND dim = ?",
+        (role['id'], digest, TEXT_VECTOR_DIM)
+    ).fetchone()
+    if row is not None:
+        return from_blob(row[0])
+
+    vector = vectorize(f"{role.get('title', '')}\n{description}")
+    with transaction() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO role_vectors (role_id, description_sha256, dim, vector) VALUES (?, ?, ?, ?)",
+            (role['id'], digest, TEXT_VECTOR_DIM, to_blob(vector))
+        )
+    return vector
+
+
+def role_similarity(resume, role):
+    """Cosine similarity between resume text and a role's title and description, in [-1, 1]"""
+    return float(np.dot(vectorize(resume), get_role_vector(role)))
+
+
+def role_calibration(role):
+    """(similarity, overall_match) of every LLM-screened candidate of a role, lowest similarity first"""
+    role_vector = get_role_vector(role)
+    rows = get_connection().execute(
+        """
+        SELECT c.resume, e.overall_match FROM evaluations e
+        JOIN candidates c ON c.id = e.candidate_id
+        WHERE e.role_id = ? AND e.analysis_notes NOT LIKE 'Provisional:%'
+        """,
+        (role['id'],)
+    ).fetchall()
+    return sorted((float(np.dot(vectorize(resume), role_vector)), match or 0) for resume, match in rows if resume)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show how the pre-filter similarity of a role's screened candidates relates to their scores")
+    parser.add_argument("role_title", help="Title of the role to calibrate")
+    parser.add_argument("--min-match", type=int, default=CALIBRATION_MIN_MATCH,
+                        help="overall_match of the candidates the pre-filter must keep")
+    args = parser.parse_args()
+
+    role = get_role(args.role_title)
+    pairs = role_calibration(role)
+    if not pairs:
+        print(f"No LLM evaluations with a resume for {role['title']}")
+        return
+    similarities = np.array([similarity for similarity, _ in pairs])
+    kept = np.array([similarity for similarity, match in pairs if match >= args.min_match])
+    print(f"{'candidates':<28} {'count':>6} {'p5':>7} {'p50':>7} {'p95':>7}")
+    for label, values in (("all", similarities), (f"overall_match >= {args.min_match}", kept)):
+        if len(values):
+            p5, p50, p95 = np.percentile(values, [5, 50, 95])
+            print(f"{label:<28} {len(values):>6} {p5:>7.3f} {p50:>7.3f} {p95:>7.3f}")
+    if not len(kept):
+        print(f"No candidate reached overall_match {args.min_match}; keep the pre-filter off for this role")
+        return
+    threshold = np.floor(kept.min() * 1000) / 1000
+    skipped = int(np.sum(similarities < threshold))
+    print(f"PREFILTER_THRESHOLD={threshold:.3f} keeps every candidate with overall_match >= {args.min_match} "
+          f"and would have skipped {skipped} of {len(pairs)} candidates")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,329 @@
+import argparse
+import atexit
+import contextvars
+import functools
+import glob
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from logger import get_logger
+
+load_dotenv()
+# "jsonl", "sqlite" or "none" (default); metrics are kept in memory either way
+TRACE_SINK = os.getenv('TRACE_SINK', 'none')
+TRACE_PATH = os.getenv('TRACE_PATH', os.path.join(
+    os.path.dirname(__file__), 'db', 'traces.db' if TRACE_SINK == 'sqlite' else 'traces.jsonl'
+))
+# Spans waiting for the writer thread; when it falls behind, new spans are dropped rather than blocking callers
+TRACE_QUEUE_SIZE = int(os.getenv('TRACE_QUEUE_SIZE', '10000'))
+# The jsonl file is rotated to traces.jsonl.1 ... .N when it reaches TRACE_MAX_BYTES
+TRACE_MAX_BYTES = int(os.getenv('TRACE_MAX_BYTES', str(50 * 1024 * 1024)))
+TRACE_BACKUPS = int(os.getenv('TRACE_BACKUPS', '3'))
+
+logger = get_logger(__name__)
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOKEN_FIELDS = ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+
+_tags = contextvars.ContextVar('trace_tags', default={})
+
+
+@contextmanager
+def trace_context(**tags):
+    """Tag every span opened inside the block, e.g. with the candidate and role being screened.
+
+    Context variables follow asyncio tasks; code handed to a thread pool must
+    open its own trace_context.
+    """
+    token = _tags.set({**_tags.get(), **tags})
+    try:
+        yield
+    finally:
+        _tags.reset(token)
+
+
+@contextmanager
+def span(stage, **tags):
+    """Time the enclosed block as one trace record.
+
+    Yields the record dict so the block can attach measurements such as
+    token counts (TOKEN_FIELDS) or cache_hit; an exception marks it as an error.
+    """
+    record = {"stage": stage, **_tags.get(), **tags}
+    start = time.perf_counter()
+    record["start"] = time.time()
+    try:
+        yield record
+        record.setdefault("status", "ok")
+    except BaseException as e:
+        record["status"] = "error"
+        record["error"] = e.__class__.__name__
+        raise
+    finally:
+        record["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        _metrics.observe(record)
+        sink = get_sink()
+        if sink is not None:
+            sink.write(record)
+
+
+def traced(stage):
+    """Decorator running each call of a function inside span(stage)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class Metrics:
+    """In-memory per-stage latency histograms, error counts, token and cache hit totals"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def observe(self, record):
+        seconds = record["duration_ms"] / 1000
+        with self._lock:
+            stage = self.stages.get(record["stage"])
+            if stage is None:
+                stage = self.stages[record["stage"]] = {
+                    "count": 0, "sum": 0.0, "errors": 0, "cache_hits": 0,
+                    "buckets": [0] * len(self.buckets),
+                    "tokens": dict.fromkeys(TOKEN_FIELDS, 0),
+                }
+            stage["count"] += 1
+            stage["sum"] += seconds
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    stage["buckets"][i] += 1
+            if record.get("status") == "error":
+                stage["errors"] += 1
+            if record.get("cache_hit"):
+                stage["cache_hits"] += 1
+            for field in TOKEN_FIELDS:
+                stage["tokens"][field] += record.get(field) or 0
+
+    def render(self, gauges=None):
+        """Prometheus text exposition of the collected metrics, plus any extra gauges {name: value}"""
+        with self._lock:
+            stages = {name: json.loads(json.dumps(stage)) for name, stage in sorted(self.stages.items())}
+        lines = [
+            "# HELP talentnexus_stage_duration_seconds Wall time of traced workflow stages",
+            "# TYPE talentnexus_stage_duration_seconds histogram",
+        ]
+        for name, stage in stages.items():
+            for bound, count in zip(self.buckets, stage["buckets"]):
+                lines.append(f'talentnexus_stage_duration_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+            lines.append(f'talentnexus_stage_duration_seconds_bucket{{stage="{name}",le="+Inf"}} {stage["count"]}')
+            lines.append(f'talentnexus_stage_duration_seconds_sum{{stage="{name}"}} {stage["sum"]:.6f}')
+            lines.append(f'talentnexus_stage_duration_seconds_count{{stage="{name}"}} {stage["count"]}')
+        lines += ["# HELP talentnexus_stage_errors_total Traced stages that raised", "# TYPE talentnexus_stage_errors_total counter"]
+        lines += [f'talentnexus_stage_errors_total{{stage="{name}"}} {stage["errors"]}' for name, stage in stages.items()]
+        lines += ["# HELP talentnexus_cache_hits_total Stages served from a cache", "# TYPE talentnexus_cache_hits_total counter"]
+        lines += [f'talentnexus_cache_hits_total{{stage="{name}"}} {stage["cache_hits"]}' for name, stage in stages.items()]
+        lines += ["# HELP talentnexus_llm_tokens_total Tokens reported by the Messages API", "# TYPE talentnexus_llm_tokens_total counter"]
+        for name, stage in stages.items():
+            for field, value in stage["tokens"].items():
+                if value:
+                    lines.append(f'talentnexus_llm_tokens_total{{stage="{name}",type="{field}"}} {value}')
+        for gauge, value in (gauges or {}).items():
+            if value is not None:
+                lines += [f"# TYPE {gauge} gauge", f"{gauge} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+class BackgroundSink:
+    """Queues span records for a writer thread, so traced code never waits on the disk.
+
+    Subclasses implement _write_batch(records), which runs on the writer thread
+    with every record queued so far; a full queue drops new records.
+    """
+
+    def __init__(self, queue_size=TRACE_QUEUE_SIZE):
+        self.dropped = 0
+        self._queue = queue.Queue(queue_size)
+        self._thread = threading.Thread(target=self._run, name=f"trace-{self.__class__.__name__}", daemon=True)
+        self._thread.start()
+        # Write what is still queued when the process exits
+        atexit.register(self.close)
+
+    def write(self, record):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Block until every record queued so far has been written"""
+        self._queue.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            records = [self._queue.get()]
+            while True:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in records
+            try:
+                self._write_batch([record for record in records if record is not None])
+            except Exception as e:
+                self.dropped += len(records)
+                logger.error("Trace writer failed, dropped %d spans: %s", len(records), e)
+            finally:
+                for _ in records:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, records):
+        raise NotImplementedError
+
+
+class JsonlSink(BackgroundSink):
+    """Appends spans as JSON lines; the file is rotated when it reaches max_bytes, keeping backups old files"""
+
+    def __init__(self, path, max_bytes=TRACE_MAX_BYTES, backups=TRACE_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._file = open(path, "a", encoding="utf-8")
+        super().__init__()
+
+    def _write_batch(self, records):
+        self._file.write("".join(json.dumps(record, default=str) + "\n" for record in records))
+        self._file.flush()
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def read(self):
+        """Records of the rotated files and the current one, oldest first"""
+        self.flush()
+        backups = [path for path in glob.glob(glob.escape(self.path) + ".*") if path.rsplit(".", 1)[1].isdigit()]
+        backups.sort(key=lambda path: int(path.rsplit(".", 1)[1]), reverse=True)
+        records = []
+        for path in backups + [self.path]:
+            with open(path, encoding="utf-8") as f:
+                records += [json.loads(line) for line in f if line.strip()]
+        return records
+
+
+class SqliteSink(BackgroundSink):
+    """Inserts spans into a spans table, one transaction per batch of queued records"""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS spans (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                start REAL NOT NULL,
+                stage TEXT NOT NULL,
+                status TEXT NOT NULL,
+                duration_ms REAL NOT NULL,
+                record TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_spans_stage ON spans (stage, start)")
+        self._lock = threading.Lock()
+        super().__init__()
+
+    def _write_batch(self, records):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO spans (start, stage, status, duration_ms, record) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (record["start"], record["stage"], record["status"], record["duration_ms"], json.dumps(record, default=str))
+                        for record in records
+                    ]
+                )
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def read(self):
+        self.flush()
+        with self._lock:
+            return [json.loads(row[0]) for row in self._conn.execute("SELECT record FROM spans ORDER BY id")]
+
+
+_metrics = Metrics()
+_sink = None
+_sink_lock = threading.Lock()
+
+def get_sink():
+    """Return the configured trace sink, opening it on first use; None when TRACE_SINK is "none" """
+    global _sink
+    if _sink is None and TRACE_SINK != 'none':
+        with _sink_lock:
+            if _sink is None:
+                _sink = SqliteSink(TRACE_PATH) if TRACE_SINK == 'sqlite' else JsonlSink(TRACE_PATH)
+    return _sink
+
+def render_metrics(gauges=None):
+    return _metrics.render(gauges)
+
+
+def summarize(records):
+    """(stage, count, errors, p50_ms, p95_ms, total_s) rows, slowest total first"""
+    by_stage = {}
+    for record in records:
+        by_stage.setdefault(record["stage"], []).append(record)
+    rows = []
+    for stage, stage_records in by_stage.items():
+        durations = sorted(record["duration_ms"] for record in stage_records)
+        errors = sum(1 for record in stage_records if record.get("status") == "error")
+        p50 = durations[int(0.50 * (len(durations) - 1))]
+        p95 = durations[int(0.95 * (len(durations) - 1))]
+        rows.append((stage, len(durations), errors, p50, p95, sum(durations) / 1000))
+    return sorted(rows, key=lambda row: row[5], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize recorded trace spans per stage")
+    parser.add_argument("--role", help="only spans tagged with this role title")
+    args = parser.parse_args()
+
+    sink = get_sink()
+    if sink is None:
+        print("Tracing is disabled (TRACE_SINK=none)")
+        return
+    records = [record for record in sink.read() if args.role is None or record.get("role") == args.role]
+    print(f"{'stage':<40} {'count':>7} {'errors':>7} {'p50 ms':>10} {'p95 ms':>10} {'total s':>10}")
+    for stage, count, errors, p50, p95, total in summarize(records):
+        print(f"{stage:<40} {count:>7} {errors:>7} {p50:>10.1f} {p95:>10.1f} {total:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,55 +1,202 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from PyPDF2 import PdfReader
+import hashlib
+import multiprocessing
 import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from dotenv import load_dotenv
 from docx import Document
+from resume_cache import get_resume_cache
+from tracing import span
+from logger import get_logger
 
 load_dotenv()
 TYPEFORM_API_KEY = os.getenv('TYPEFORM_API_KEY')
+DOWNLOAD_DIR = os.getenv('DOWNLOAD_DIR', '/downloads/')
+RESUME_MAX_BYTES = int(os.getenv('RESUME_MAX_BYTES', str(20 * 1024 * 1024)))
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_CONNECT_TIMEOUT = float(os.getenv('DOWNLOAD_CONNECT_TIMEOUT', '5'))
+DOWNLOAD_READ_TIMEOUT = float(os.getenv('DOWNLOAD_READ_TIMEOUT', '30'))
+DOWNLOAD_RETRIES = int(os.getenv('DOWNLOAD_RETRIES', '3'))
+DOWNLOAD_BACKOFF = float(os.getenv('DOWNLOAD_BACKOFF', '0.5'))
+DOWNLOAD_POOL_SIZE = int(os.getenv('DOWNLOAD_POOL_SIZE', '10'))
+PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', '50'))
+RESUME_MAX_CHARS = int(os.getenv('RESUME_MAX_CHARS', '200000'))
+PDF_PARALLEL_PAGE_THRESHOLD = int(os.getenv('PDF_PARALLEL_PAGE_THRESHOLD', '8'))
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', str(os.cpu_count() or 2)))
+# Bump when extraction changes so cached text from older parsers is not reused
+PARSER_VERSION = f"1-p{PDF_MAX_PAGES}-c{RESUME_MAX_CHARS}"
 
-def extract_resume(url):
-    pdf_file_path = url
-    write_path = "/downloads/" + pdf_file_path.split("/")[-1]
-    need_conversion = pdf_file_path.lower().endswith('.pdf')
+logger = get_logger(__name__)
+
+
+class ResumeDownloadError(Exception):
+    """Raised when a resume can't be downloaded"""
+
+
+class ResumeParseError(Exception):
+    """Raised when a downloaded resume can't be converted to text"""
+
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Return the shared Typeform download session, creating it on first use"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=DOWNLOAD_RETRIES,
+                backoff_factor=DOWNLOAD_BACKOFF,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=["GET"],
+                respect_retry_after_header=True,
+            )
+            adapter = HTTPAdapter(pool_connections=DOWNLOAD_POOL_SIZE, pool_maxsize=DOWNLOAD_POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["Authorization"] = f"Bearer {TYPEFORM_API_KEY}"
+            _session = session
+        return _session
+
+def download_resume(url, directory=DOWNLOAD_DIR, max_bytes=RESUME_MAX_BYTES):
+    """Stream a file into a new private file in directory, refusing anything larger than max_bytes.
+
+    Returns (path, size, sha256) of the downloaded bytes. The file belongs to
+    the caller, who must delete it; nothing else writes to that path, so
+    concurrent uploads with the same file name can't swap contents.
+    """
+    digest = hashlib.sha256()
+    extension = os.path.splitext(url.split("?")[0].split("/")[-1])[1]
+    path = None
+    try:
+        fd, path = tempfile.mkstemp(dir=directory, prefix="resume-", suffix=extension)
+        with os.fdopen(fd, "wb") as file, \
+                get_session().get(url, stream=True, timeout=(DOWNLOAD_CONNECT_TIMEOUT, DOWNLOAD_READ_TIMEOUT)) as response:
+            if response.status_code != 200:
+                raise ResumeDownloadError(f"Failed to download the file. Status code: {response.status_code}")
+            content_length = response.headers.get("Content-Length")
+            if content_length and int(content_length) > max_bytes:
+                raise ResumeDownloadError(f"File is {content_length} bytes, limit is {max_bytes}")
+            
+            size = 0
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ResumeDownloadError(f"File exceeds the {max_bytes} byte limit")
+                digest.update(chunk)
+                file.write(chunk)
+    except BaseException as e:
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+        if isinstance(e, requests.RequestException):
+            raise ResumeDownloadError(f"Failed to download the file: {e}") from e
+        if isinstance(e, OSError):
+            raise ResumeDownloadError(f"Failed to save the file in {directory}: {e}") from e
+        raise
+    return path, size, digest.hexdigest()
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+def get_pdf_pool():
+    """Return the shared process pool used for large PDFs, creating it on first use"""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # Forking would copy the worker threads' locks and open connections mid-use into the children
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context(method))
+        return _pdf_pool
+
+def _extract_page_range(path, start, stop):
+    """Extract the text of pages [start, stop) in a pool process"""
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+def extract_pdf_text(path, max_pages=PDF_MAX_PAGES, max_chars=RESUME_MAX_CHARS):
+    """Return (text, page_count) for a PDF, reading at most max_pages pages and max_chars characters.
+
+    Short documents are read in-process; longer ones are split into page
+    ranges that are extracted in parallel by the shared process pool.
+    """
+    reader = PdfReader(path)
+    page_count = min(len(reader.pages), max_pages)
     
-    #Download file
-    headers = {"Authorization": f"Bearer {TYPEFORM_API_KEY}"}
-    response = requests.get(pdf_file_path, headers=headers)
-    if response.status_code == 200:
-        with open(write_path, "wb") as file:
-            file.write(response.content)
-        print("File downloaded successfully.")
+    parts = []
+    if page_count <= PDF_PARALLEL_PAGE_THRESHOLD:
+        length = 0
+        for page_num in range(page_count):
+            page_text = reader.pages[page_num].extract_text() or ""
+            parts.append(page_text)
+            length += len(page_text)
+            if length >= max_chars:
+                break
     else:
-        print(f"Failed to download the file. Status code: {response.status_code}")
-        exit()
+        pool = get_pdf_pool()
+        chunk_size = -(-page_count // PDF_WORKERS)
+        futures = [
+            pool.submit(_extract_page_range, path, start, min(start + chunk_size, page_count))
+            for start in range(0, page_count, chunk_size)
+        ]
+        for future in futures:
+            parts.extend(future.result())
     
-    #Convert to pdf
-    text = ""
+    return ''.join(parts)[:max_chars], page_count
 
-    if need_conversion:
+def extract_resume(url):
+    with span("extract_resume") as trace:
+        need_conversion = url.lower().endswith('.pdf')
+        
+        #Download file
+        with span("extract_resume.download"):
+            path, _, sha256 = download_resume(url)
+        logger.debug("File downloaded successfully.")
+        
+        # Parse the private download, so the cached text always belongs to the bytes that were hashed
         try:
-            # Read the downloaded PDF to ensure it's a valid PDF
-            with open(write_path, "rb") as f:
-                reader = PdfReader(f)
-                # Loop through all the pages and extract text
-                for page_num in range(len(reader.pages)):
-                    page = reader.pages[page_num]
-                    text += page.extract_text()
-
-        except Exception as e:
-            print(f"Error reading PDF: {e}")
-            exit()
-    else:
-        doc = Document(write_path)
-        text = '\n'.join([para.text for para in doc.paragraphs])
+            # Skip parsing entirely for a file we have already seen
+            resume_cache = get_resume_cache()
+            cached = resume_cache.get(sha256, PARSER_VERSION)
+            trace["cache_hit"] = cached is not None
+            if cached is not None:
+                logger.debug("Using cached resume text.")
+                return cached[0]
+            
+            #Convert to pdf
+            text = ""
+            page_count = None
+
+            if need_conversion:
+                try:
+                    text, page_count = extract_pdf_text(path)
+                except Exception as e:
+                    raise ResumeParseError(f"Error reading PDF: {e}") from e
+            else:
+                doc = Document(path)
+                text = '\n'.join([para.text for para in doc.paragraphs])[:RESUME_MAX_CHARS]
             
-    return text
+            resume_cache.set(sha256, text, PARSER_VERSION, page_count)
+            return text
+        finally:
+            os.remove(path)
 
 def process_answers(answers):
     record = {}
     for i in range(len(answers)):
         if i == 0:
-            record["role_title"] = answers[i]["choice"]['label']
+            # Single-choice questions give one role, multiple-choice questions a list of roles
+            if answers[i]["type"] == "choices":
+                record["role_titles"] = answers[i]["choices"]["labels"]
+            else:
+                record["role_titles"] = [answers[i]["choice"]['label']]
+            record["role_title"] = record["role_titles"][0]
         elif i == 1:
             record["first_name"] = answers[i]["text"]
         elif i == 2: